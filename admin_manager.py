@@ -0,0 +1,251 @@
+import io
+import re
+import csv
+import logging
+from typing import Iterable, List, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+# Every admin write bumps a version row and publishes "<version> +alice -bob ..."
+# on this channel in the same transaction, so other processes can patch their cache.
+# A change too big for one notification is published as "<version> *" (reload).
+ADMIN_CHANNEL = "admin_users"
+RELOAD = "*"
+NOTIFY_PAYLOAD_LIMIT = 7900  # Postgres rejects payloads of 8000 bytes or more
+
+# Telegram usernames: 5-32 characters, letters, digits and underscores, starting with a letter
+USERNAME_RE = re.compile(r"[A-Za-z][A-Za-z0-9_]{4,31}")
+
+Change = Tuple[str, str]  # ("+" or "-", username)
+
+BUMP_VERSION_SQL = """
+    INSERT INTO admin_users_version (id, version) VALUES (TRUE, 1)
+    ON CONFLICT (id) DO UPDATE SET version = admin_users_version.version + 1
+    RETURNING version
+"""
+NOTIFY_SQL = "SELECT pg_notify(%s, %s)"
+# One statement, so the usernames and the version come from the same snapshot
+LOAD_ADMINS_SQL = """
+    SELECT COALESCE((SELECT version FROM admin_users_version WHERE id), 0), array_agg(username)
+    FROM admin_users
+"""
+VERSION_SQL = "SELECT version FROM admin_users_version WHERE id"
+IMPORT_ADMINS_SQL = """
+    INSERT INTO admin_users (username) VALUES %s
+    ON CONFLICT (username) DO NOTHING
+    RETURNING username
+"""
+
+
+def encode_changes(version: int, changes: List[Change]) -> str:
+    payload = f"{version} " + " ".join(op + username for op, username in changes)
+    if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+        return f"{version} {RELOAD}"
+    return payload
+
+
+def decode_changes(payload: str) -> Tuple[int, Optional[List[Change]]]:
+    """Returns (version, changes); changes is None when the receiver must reload."""
+    version, body = payload.split(" ", 1)
+    if body == RELOAD:
+        return int(version), None
+    changes = [(change[0], change[1:]) for change in body.split(" ")]
+    if any(op not in "+-" or not username for op, username in changes):
+        raise ValueError(f"bad admin change in {payload!r}")
+    return int(version), changes
+
+
+def usernames_from_csv(text: str) -> List[str]:
+    """Usernames from CSV or plain text: the "username" column if there's a header, else every cell."""
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    header = [cell.strip().lower() for cell in rows[0]] if rows else []
+    if "username" in header:
+        column = header.index("username")
+        return [row[column] for row in rows[1:] if len(row) > column]
+    return [cell for row in rows for cell in row]
+
+
+def admins_to_csv(usernames: Iterable[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["username"])
+    writer.writerows([username] for username in usernames)
+    return buffer.getvalue().encode()
+
+class AdminManager:
+    def __init__(self, db: Database):
+        self.db = db
+        self.super_admin_ids: Set[int] = set()
+        self.super_admin_usernames: Set[str] = {"vvmode","Xellision"}
+        self.admin_usernames: Set[str] = set()
+        # Bumped whenever admin_usernames changes, so derived views can be cached
+        self.version = 0
+        # Last database-wide admin version applied to admin_usernames
+        self.synced_version = 0
+        # Admin users are loaded from the DB pool during app startup
+
+    def set_super_admin(self, user_id: int, username: str = None):
+        self.super_admin_ids.add(user_id)
+        if username:
+            self.super_admin_usernames.add(username)
+
+    def get_admins(self) -> List[str]:
+        """Returns a list of all admin usernames (excluding super admins)."""
+        return sorted(self.admin_usernames)
+
+    async def add_admin(self, username: str) -> bool:
+        username = username.strip().lstrip('@')
+        if username and username not in self.super_admin_usernames and username not in self.admin_usernames:
+            await self.store_admin_user_to_db(username)  # Store in DB and update in-memory set
+            return True
+        return False
+
+    async def remove_admin(self, username: str) -> bool:
+        username = username.strip().lstrip('@')
+        if username in self.admin_usernames:
+            await self.remove_admin_from_db(username)
+            return True
+        return False
+
+    async def import_admins(self, usernames: Iterable[str]) -> Tuple[List[str], List[str], List[str]]:
+        """Adds many admins in one transaction and one cache update.
+
+        Returns (added, skipped, invalid); skipped are super admins, existing
+        admins and repeats. Database errors are raised to the caller.
+        """
+        candidates: List[str] = []
+        skipped: List[str] = []
+        invalid: List[str] = []
+        seen: Set[str] = set()
+        for username in usernames:
+            username = username.strip().lstrip('@')
+            if not username:
+                continue
+            if not USERNAME_RE.fullmatch(username):
+                invalid.append(username)
+            elif username in seen or username in self.super_admin_usernames or username in self.admin_usernames:
+                skipped.append(username)
+            else:
+                seen.add(username)
+                candidates.append(username)
+        if not candidates:
+            return [], skipped, invalid
+
+        def store(cursor):
+            rows = execute_values(
+                cursor, IMPORT_ADMINS_SQL, [(username,) for username in candidates],
+                page_size=len(candidates), fetch=True,
+            )
+            inserted = [username for (username,) in rows]
+            changes = [("+", username) for username in inserted]
+            return inserted, (self._publish(cursor, changes) if changes else None)
+
+        inserted, version = await self.db.run(store, label="import_admins")
+        if version is not None:
+            self._applied_own_write(version, [("+", username) for username in inserted])
+        # Rows that already existed were added by another process; its notification brings them in.
+        added = set(inserted)
+        skipped.extend(username for username in candidates if username not in added)
+        logger.info(f"✅ Imported {len(inserted)} admin users ({len(skipped)} skipped, {len(invalid)} invalid)")
+        return inserted, skipped, invalid
+
+    # === Cache sync ===
+    def apply_change(self, version: int, changes: Optional[List[Change]]) -> bool:
+        """Applies a change published by any process.
+
+        Returns False when an earlier change was missed, or the change can't
+        be patched in, and a full reload is needed.
+        """
+        if version <= self.synced_version:
+            return True  # already applied, e.g. our own write
+        if version != self.synced_version + 1 or changes is None:
+            return False
+        self.synced_version = version
+        self._patch(changes)
+        return True
+
+    def _patch(self, changes: List[Change]):
+        # One version bump per batch, so cached views are rebuilt once
+        changed = False
+        for op, username in changes:
+            if op == "+" and username not in self.admin_usernames:
+                self.admin_usernames.add(username)
+                changed = True
+            elif op == "-" and username in self.admin_usernames:
+                self.admin_usernames.discard(username)
+                changed = True
+        if changed:
+            self.version += 1
+
+    def _applied_own_write(self, version: int, changes: List[Change]):
+        # Patch right away; the NOTIFY echo of this write is then a no-op.
+        self._patch(changes)
+        if version == self.synced_version + 1:
+            self.synced_version = version
+
+    async def fetch_version(self) -> int:
+        rows = await self.db.fetchall(VERSION_SQL)
+        return rows[0][0] if rows else 0
+
+    async def load_admin_users_from_db(self):
+        try:
+            rows = await self.db.fetchall(LOAD_ADMINS_SQL)
+            version, usernames = rows[0] if rows else (0, None)
+
+            admin_usernames = {username for username in usernames or () if username}
+            if admin_usernames != self.admin_usernames:
+                self.admin_usernames = admin_usernames
+                self.version += 1
+            self.synced_version = version
+            logger.info(f"👮 Loaded {len(self.admin_usernames)} admin users (version {version})")
+        except Exception as e:
+            logger.error(f"❌ Failed to load admin users: {e}")
+
+    def _publish(self, cursor, changes: List[Change]) -> int:
+        cursor.execute(BUMP_VERSION_SQL)
+        (version,) = cursor.fetchone()
+        cursor.execute(NOTIFY_SQL, (ADMIN_CHANNEL, encode_changes(version, changes)))
+        return version
+
+    async def store_admin_user_to_db(self, username: str):
+        def store(cursor):
+            cursor.execute("""
+                INSERT INTO admin_users (username)
+                VALUES (%s)
+                ON CONFLICT (username) DO UPDATE
+                SET username = EXCLUDED.username
+            """, (username,))
+            return self._publish(cursor, [("+", username)])
+
+        try:
+            version = await self.db.run(store, label="store_admin")
+            self._applied_own_write(version, [("+", username)])
+            logger.info(f"✅ Admin user {username} stored successfully.")
+        except Exception as e:
+            logger.error(f"❌ Failed to store admin user: {e}")
+
+    async def remove_admin_from_db(self, username: str):
+        def remove(cursor):
+            cursor.execute("DELETE FROM admin_users WHERE username = %s", (username,))
+            return self._publish(cursor, [("-", username)])
+
+        try:
+            version = await self.db.run(remove, label="remove_admin")
+            self._applied_own_write(version, [("-", username)])
+            logger.info(f"🗑 Admin user {username} removed from database.")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to remove admin user from DB: {e}")
+        
+        
+    def is_admin(self, username: str = None) -> bool:
+        return (username is not None and username in self.admin_usernames
+        )
+
+    def is_super_admin(self, user_id: int = None, username: str = None) -> bool:
+        return (
+            (user_id is not None and user_id in self.super_admin_ids)
+            or (username is not None and username in self.super_admin_usernames)
+        )
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from admin_manager import ADMIN_CHANNEL, AdminManager, decode_changes
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class AdminSync:
+    """Keeps AdminManager's in-memory admin set in step with other processes.
+
+    A dedicated connection LISTENs on the admin channel and its socket is
+    watched with ``loop.add_reader``, so each NOTIFY patches the cache as soon
+    as the writing transaction commits. Notifications carry the database-wide
+    admin version; a gap means one was missed and the set is reloaded.
+
+    As a fallback, the version row is polled every ``poll_interval`` seconds,
+    which bounds how stale the cache can get while the listener is down. A lost
+    listener is reconnected on the next poll.
+    """
+
+    def __init__(self, admin_manager: AdminManager, db: Database, poll_interval: float = 30.0):
+        self.admin_manager = admin_manager
+        self.db = db
+        self.poll_interval = poll_interval
+
+        self._conn: Optional[Any] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.notifications = 0
+        self.reloads = 0
+        self.polls = 0
+        self.errors = 0
+
+    # === Lifecycle ===
+    async def start(self):
+        """Starts listening, loads the admin set, then starts the polling fallback."""
+        # LISTEN before loading, so no change can slip in between the two.
+        await self._listen()
+        await self.admin_manager.load_admin_users_from_db()
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        for task in (self._poll_task, self._reload_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(task for task in (self._poll_task, self._reload_task) if task is not None),
+            return_exceptions=True,
+        )
+        self._poll_task = self._reload_task = None
+        self._unlisten()
+
+    # === LISTEN/NOTIFY ===
+    async def _listen(self):
+        try:
+            conn = await self.db.connect(autocommit=True)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {ADMIN_CHANNEL}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Admin LISTEN unavailable, polling every {self.poll_interval:g}s: {e}")
+            return
+        self._conn = conn
+        asyncio.get_running_loop().add_reader(conn.fileno(), self._on_readable)
+        logger.info(f"👂 Listening for admin changes on '{ADMIN_CHANNEL}'")
+
+    def _unlisten(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+        except Exception:
+            pass  # the socket is already gone
+        conn.close()
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Admin listener connection lost: {e}")
+            self._unlisten()
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            self.notifications += 1
+            if not self._apply(notify.payload):
+                self._request_reload()
+
+    def _apply(self, payload: str) -> bool:
+        try:
+            version, changes = decode_changes(payload)
+        except (ValueError, IndexError):
+            logger.warning(f"⚠️ Ignoring malformed admin notification: {payload!r}")
+            return False
+        return self.admin_manager.apply_change(version, changes)
+
+    # === Reload / polling fallback ===
+    def _request_reload(self):
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload())
+
+    async def _reload(self):
+        self.reloads += 1
+        await self.admin_manager.load_admin_users_from_db()
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.polls += 1
+            try:
+                if self._conn is None:
+                    await self._listen()
+                    if self._conn is not None:
+                        # Changes made while we weren't listening are only visible via a reload.
+                        self._request_reload()
+                        continue
+                if await self.admin_manager.fetch_version() != self.admin_manager.synced_version:
+                    self._request_reload()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Admin version poll failed: {e}")
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self._conn is not None,
+            "synced_version": self.admin_manager.synced_version,
+            "admins": len(self.admin_manager.admin_usernames),
+            "notifications": self.notifications,
+            "reloads": self.reloads,
+            "polls": self.polls,
+            "errors": self.errors,
+        }
@@ -0,0 +1,105 @@
+"""Broadcast fan-out against a simulated Bot API.
+
+Sends one announcement to ``--recipients`` users through Broadcaster. The fake
+Telegram answers after ``--latency`` seconds, some users have never started the
+bot (403), some sends fail transiently (502), and a few hit flood control
+(429). Reports how long the broadcast took, the delivery status, and the most
+sends Telegram saw in any one-second window (which must stay within the
+global rate).
+
+    python -m benchmarks.bench_broadcast --recipients 300 --rate 25
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+
+from benchmarks import fakes  # also sets the offline bot token
+
+from telegram import Bot
+
+from broadcaster import Broadcaster
+
+
+class FlakyTelegramRequest(fakes.FakeTelegramRequest):
+    """FakeTelegramRequest whose sendMessage calls fail for some recipients."""
+
+    def __init__(self, latency: float, blocked: float, flaky: float, flood: float, seed: int = 1):
+        super().__init__(latency)
+        self.rng = random.Random(seed)
+        self.blocked = blocked
+        self.flaky = flaky
+        self.flood = flood
+        self.sent_at = []
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        if not url.endswith("/sendMessage"):
+            return await super().do_request(url, method, request_data, **kwargs)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        chat_id = request_data.parameters["chat_id"]
+        roll = self.rng.random()
+        if chat_id % 100 < self.blocked * 100:
+            return 403, json.dumps({"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}).encode()
+        if roll < self.flood:
+            return 429, json.dumps({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                    "parameters": {"retry_after": 1}}).encode()
+        if roll < self.flood + self.flaky:
+            return 502, json.dumps({"ok": False, "error_code": 502, "description": "Bad Gateway"}).encode()
+        self.sent_at.append(time.monotonic())
+        return await super().do_request(url, method, request_data, **kwargs)
+
+    def peak_per_second(self) -> int:
+        window, peak = deque(), 0
+        for sent in self.sent_at:
+            window.append(sent)
+            while window[0] <= sent - 1:
+                window.popleft()
+            peak = max(peak, len(window))
+        return peak
+
+
+async def run(args):
+    telegram = FlakyTelegramRequest(args.latency, args.blocked, args.flaky, args.flood)
+    bot = Bot(os.environ["TELEGRAM_BOT_TOKEN"], request=telegram, get_updates_request=telegram)
+    broadcaster = Broadcaster(bot, concurrency=args.concurrency, global_rate=args.rate, backoff=args.backoff)
+    broadcaster.start()
+
+    started = time.perf_counter()
+    broadcast = broadcaster.broadcast(range(1, args.recipients + 1), "📍 <b>Venue changed</b> to Bench Arena.")
+    enqueue_ms = (time.perf_counter() - started) * 1000
+    while broadcast.pending:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    await broadcaster.stop()
+
+    counts = broadcast.counts()
+    print(f"recipients:  {args.recipients}  (enqueued in {enqueue_ms:.2f} ms)")
+    print(f"finished in: {elapsed:.2f} s  ({counts['sent'] / elapsed:.1f} delivered/s)")
+    print(f"status:      {counts['sent']} sent, {counts['blocked']} blocked, {counts['failed']} failed, "
+          f"{broadcast.retries} retries")
+    peak = telegram.peak_per_second()
+    burst = max(1.0, args.rate / 5)  # see Broadcaster
+    verdict = "✅" if peak <= args.rate + burst else "❌"
+    print(f"peak sends:  {peak}/s in any 1 s window (limit {args.rate + burst:g}) {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=25.0, help="global sends per second")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated Bot API latency (s)")
+    parser.add_argument("--blocked", type=float, default=0.05, help="share of users who never started the bot")
+    parser.add_argument("--flaky", type=float, default=0.05, help="chance of a transient 502")
+    parser.add_argument("--flood", type=float, default=0.01, help="chance of a 429 flood-control reply")
+    parser.add_argument("--backoff", type=float, default=0.2, help="first retry delay (s)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Microbenchmarks for the per-tap hot paths across roster sizes.
+
+Covers TeamManager.join_team/leave_team, get_team_message for the first roster
+page (rendered from scratch, re-rendered after a tap elsewhere in the roster,
+and cached) and generate_buttons.
+
+    python -m benchmarks.bench_hotpaths --sizes 100 1000 10000
+"""
+import time
+import asyncio
+import argparse
+from typing import Callable
+
+from benchmarks import fakes  # noqa: F401  (sets the offline bot token before football_bot is imported)
+
+import football_bot
+from team_manager import TeamManager
+
+
+def per_call_us(fn: Callable[[], None], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def per_call_us_async(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def bench_size(size: int, repeat: int):
+    team_manager = TeamManager()
+    team_manager.max_players = size // 2
+    for uid in range(size):
+        await team_manager.join_team(uid, f"Player {uid}", f"player{uid}")
+
+    member = size // 4
+    newcomer = size + 1
+
+    async def leave_and_rejoin():
+        await team_manager.leave_team(member)
+        await team_manager.join_team(member, f"Player {member}", f"player{member}")
+
+    async def join_and_leave():
+        await team_manager.join_team(newcomer, "Newcomer", "newcomer")
+        await team_manager.leave_team(newcomer)
+
+    def render_fresh():
+        team_manager.mark_changed()
+        team_manager._page_lines.clear()
+        team_manager.get_team_message()
+
+    async def tap_and_render():
+        # The newcomer lands on the last page, so page 1 is rebuilt from cached lines.
+        await join_and_leave()
+        team_manager.get_team_message()
+
+    roles = (False, False)
+    results = {
+        "join+leave": await per_call_us_async(join_and_leave, repeat),
+        "leave+rejoin": await per_call_us_async(leave_and_rejoin, repeat),
+        "page (fresh)": per_call_us(render_fresh, max(1, repeat // 10)),
+        "tap+page": await per_call_us_async(tap_and_render, repeat),
+        "page (cached)": per_call_us(team_manager.get_team_message, repeat),
+        "buttons": per_call_us(lambda: football_bot.generate_buttons(team_manager, member, roles), repeat),
+    }
+    return results
+
+
+async def run(sizes, repeat):
+    rows = [(size, await bench_size(size, repeat)) for size in sizes]
+    columns = list(rows[0][1])
+    print(f"{'size':>7} " + " ".join(f"{name:>17}" for name in columns) + "   (µs per call)")
+    for size, results in rows:
+        print(f"{size:>7} " + " ".join(f"{results[name]:>17.2f}" for name in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Memory per event of roster entries: plain tuples vs. Player records.
+
+Builds ``--events`` rosters of ``--players`` entries each, drawn from a pool of
+``--users`` users, so a user is on events * players / users rosters on
+average. Names are formatted anew for every entry, as they are when they come
+from an update or a database row. The baseline stores (user_id, full_name,
+username) tuples; Player adds a join timestamp but shares its name strings
+through the identity cache.
+
+    python -m benchmarks.bench_memory --events 1000 --players 40 --users 5000
+"""
+import gc
+import random
+import argparse
+import tracemalloc
+from collections import namedtuple
+from typing import Callable, List
+
+from roster import IdentityCache, Player, Roster
+import roster as roster_module
+
+# Same memory layout as the old Tuple[int, str, str] entries; named so Roster can read user_id.
+TupleEntry = namedtuple("TupleEntry", "user_id full_name username")
+
+
+def build(make_entry: Callable, args) -> float:
+    """Returns the traced bytes held per event once all rosters are built."""
+    rng = random.Random(1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rosters: List[Roster] = []
+    for _ in range(args.events):
+        roster = Roster()
+        for user_id in rng.sample(range(args.users), args.players):
+            # Fresh strings every time, like a decoded update or database row.
+            entry = make_entry(user_id, f"Player {user_id} Surname", f"player_{user_id}_handle")
+            roster.join(entry, args.players // 2)
+        rosters.append(roster)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / args.events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=40, help="entries per event")
+    parser.add_argument("--users", type=int, default=5000, help="distinct users across all events")
+    args = parser.parse_args()
+
+    tuples = build(TupleEntry, args)
+    roster_module.identities = IdentityCache()  # start from an empty cache; it's counted below
+    players = build(Player, args)
+
+    shared = args.events * args.players / args.users
+    print(f"{args.events} events x {args.players} entries, {args.users} users (each on ~{shared:.1f} events)")
+    print(f"{'entry':>8}  {'KiB/event':>10}  {'bytes/entry':>12}")
+    for name, per_event in (("tuple", tuples), ("Player", players)):
+        print(f"{name:>8}  {per_event / 1024:>10.1f}  {per_event / args.players:>12.0f}")
+    print(f"saving: {1 - players / tuples:.0%} (Player includes joined_at and the identity cache)")
+
+
+if __name__ == "__main__":
+    main()
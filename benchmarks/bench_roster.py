@@ -0,0 +1,76 @@
+"""Micro-benchmark: list-scan roster vs. the indexed Roster.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_roster
+"""
+import random
+import time
+from typing import List, Tuple
+
+from roster import Player, Roster
+
+
+class ListRoster:
+    """The original list-based join/leave logic, kept here as the baseline."""
+
+    def __init__(self):
+        self.main_team: List[Tuple[int, str, str]] = []
+        self.reserve_team: List[Tuple[int, str, str]] = []
+
+    def join(self, entry, max_players):
+        if any(entry[0] == uid for uid, _, _ in self.main_team + self.reserve_team):
+            return None
+        if len(self.main_team) < max_players:
+            self.main_team.append(entry)
+            return "main"
+        self.reserve_team.append(entry)
+        return "reserve"
+
+    def leave(self, user_id):
+        for team in [self.main_team, self.reserve_team]:
+            for i, (uid, _, _) in enumerate(team):
+                if uid == user_id:
+                    team.pop(i)
+                    if team is self.main_team and self.reserve_team:
+                        self.main_team.append(self.reserve_team.pop(0))
+                    return
+        return
+
+    def is_main(self, user_id):
+        return any(member_id == user_id for member_id, _, _ in self.main_team)
+
+
+def run(roster_cls, size: int, ops: int, seed: int = 1) -> float:
+    """Fills a roster with ``size`` players (half main, half reserve) and times a tap burst."""
+    rng = random.Random(seed)
+    max_players = size // 2
+    roster = roster_cls()
+    entry = Player if roster_cls is Roster else (lambda *fields: fields)
+    for uid in range(size):
+        roster.join(entry(uid, f"Player {uid}", f"user{uid}"), max_players)
+
+    user_ids = [rng.randrange(size) for _ in range(ops)]
+    started = time.perf_counter()
+    for uid in user_ids:
+        # A leave/re-join pair plus the membership check generate_buttons does per render.
+        roster.leave(uid)
+        roster.join(entry(uid, f"Player {uid}", f"user{uid}"), max_players)
+        roster.is_main(uid)
+    return time.perf_counter() - started
+
+
+def main():
+    ops = 2000
+    print(f"{'size':>7} {'list (us/op)':>14} {'indexed (us/op)':>16} {'speedup':>9}")
+    for size in (1_000, 10_000):
+        baseline = run(ListRoster, size, ops)
+        indexed = run(Roster, size, ops)
+        print(
+            f"{size:>7} {baseline / ops * 1e6:>14.2f} {indexed / ops * 1e6:>16.2f} "
+            f"{baseline / indexed:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""End-to-end load test of the /webhook endpoint, fully offline.
+
+Telegram and Postgres are replaced by the fakes in benchmarks/fakes.py, and
+synthetic updates are posted through FastAPI's ASGI app in-process. The mix
+covers /start, add, remove, team, settings and the admin flows (add_admin
+prompt + reply, list_admins, remove_admin).
+
+Reports throughput, p50/p99 latency for the webhook ack and for end-to-end
+processing, and the peak traced-memory growth per update. With
+``--redeliver``, a share of the updates is posted a second time, as Telegram
+does when an acknowledgement is slow, to check that each is processed once.
+
+    python -m benchmarks.bench_webhook --updates 5000 --concurrency 64
+"""
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from typing import Dict, List
+
+import httpx
+
+from benchmarks import fakes
+
+import football_bot
+
+logging.getLogger().setLevel(logging.WARNING)
+
+SUPER_ADMIN = next(iter(football_bot.admin_manager.super_admin_usernames))
+
+
+def build_workload(count: int, users: int, chat_id: int, seed: int) -> List[dict]:
+    """Returns ``count`` update payloads with a realistic mix of actions."""
+    rng = random.Random(seed)
+    payloads: List[dict] = []
+    organizer = 0
+    while len(payloads) < count:
+        uid = rng.randrange(1, users + 1)
+        roll = rng.random()
+        if roll < 0.05:
+            payloads.append(fakes.command_update(uid, "/start", chat_id))
+        elif roll < 0.45:
+            payloads.append(fakes.callback_update(uid, "add", chat_id))
+        elif roll < 0.75:
+            payloads.append(fakes.callback_update(uid, "remove", chat_id))
+        elif roll < 0.90:
+            payloads.append(fakes.callback_update(uid, "team", chat_id))
+        elif roll < 0.95:
+            payloads.append(fakes.callback_update(0, "settings", chat_id, username=SUPER_ADMIN))
+        else:
+            # Admin flow by the super admin: prompt, reply, list, remove.
+            organizer += 1
+            payloads.extend([
+                fakes.callback_update(0, "add_admin", chat_id, username=SUPER_ADMIN),
+                fakes.command_update(0, f"@organizer{organizer}", chat_id, username=SUPER_ADMIN),
+                fakes.callback_update(0, "list_admins", chat_id, username=SUPER_ADMIN),
+                fakes.callback_update(0, f"remove_admin:organizer{organizer}", chat_id, username=SUPER_ADMIN),
+            ])
+    return payloads[:count]
+
+
+def with_redeliveries(payloads: List[dict], share: float, seed: int) -> List[dict]:
+    """Re-posts ``share`` of the payloads (same update_id) a little later in the stream."""
+    rng = random.Random(seed)
+    result = list(payloads)
+    for payload in rng.sample(payloads, int(len(payloads) * share)):
+        position = result.index(payload) + rng.randrange(1, 200)
+        result.insert(min(position, len(result)), payload)
+    return result
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def fire(client: httpx.AsyncClient, payloads: List[dict], concurrency: int):
+    """Posts all payloads with at most ``concurrency`` requests in flight and waits for processing."""
+    sent_at: Dict[int, float] = {}
+    ack: List[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def post(payload):
+        async with slots:
+            started = time.perf_counter()
+            sent_at.setdefault(payload["update_id"], started)
+            response = await client.post("/webhook", json=payload)
+            response.raise_for_status()
+            ack.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(payload) for payload in payloads))
+    await football_bot.update_queue.drain()
+    return started, sent_at, ack
+
+
+async def run(args) -> None:
+    telegram = fakes.FakeTelegramRequest(latency=args.telegram_latency)
+    fakes.install(football_bot, telegram, fakes.FakeDatabase(latency=args.db_latency))
+
+    done_at: Dict[int, float] = {}
+    processed = 0
+    process = football_bot.update_queue.process
+
+    async def timed_process(update):
+        nonlocal processed
+        await process(update)
+        processed += 1
+        done_at[update.update_id] = time.perf_counter()
+
+    football_bot.update_queue.process = timed_process
+
+    async with football_bot.app.router.lifespan_context(football_bot.app):
+        transport = httpx.ASGITransport(app=football_bot.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Warm-up: load the event, build keyboards, fill caches.
+            await fire(client, build_workload(200, args.users, args.chat_id, seed=0), args.concurrency)
+
+            payloads = build_workload(args.updates, args.users, args.chat_id, args.seed)
+            posts = with_redeliveries(payloads, args.redeliver, args.seed)
+            processed_before = processed
+            started, sent_at, ack = await fire(client, posts, args.concurrency)
+            processed_twice = processed - processed_before - len(payloads)
+            elapsed = max(done_at[uid] for uid in sent_at) - started
+            end_to_end = [done_at[uid] - sent_at[uid] for uid in sent_at]
+
+            allocated_per_update = None
+            if args.alloc_updates:
+                alloc_payloads = build_workload(args.alloc_updates, args.users, args.chat_id, args.seed + 1)
+                tracemalloc.start()
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                await fire(client, alloc_payloads, args.concurrency)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                allocated_per_update = (peak - before) / len(alloc_payloads)
+
+    edits = football_bot.edit_scheduler.stats()
+    print(f"updates:        {len(payloads)} ({args.users} users, concurrency {args.concurrency})")
+    print(f"throughput:     {len(payloads) / elapsed:,.0f} updates/s")
+    print(f"ack latency:    p50 {percentile(ack, 0.50) * 1000:.2f} ms   p99 {percentile(ack, 0.99) * 1000:.2f} ms")
+    print(f"end-to-end:     p50 {percentile(end_to_end, 0.50) * 1000:.2f} ms   "
+          f"p99 {percentile(end_to_end, 0.99) * 1000:.2f} ms")
+    if allocated_per_update is not None:
+        print(f"memory:         {allocated_per_update / 1024:.2f} KiB peak traced growth per update")
+    if args.redeliver:
+        print(f"redeliveries:   {len(posts) - len(payloads)} posted, "
+              f"{football_bot.recent_updates.hits} dropped, {processed_twice} processed twice")
+    print(f"telegram calls: {len(telegram.calls)} "
+          f"(edits sent {edits['sent']}, coalesced {edits['coalesced']}, unchanged {edits['unchanged']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64, help="webhook requests in flight")
+    parser.add_argument("--chat-id", type=int, default=-100)
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="simulated Bot API latency (s)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="simulated database latency (s)")
+    parser.add_argument("--alloc-updates", type=int, default=1000, help="updates in the tracemalloc pass (0 = skip)")
+    parser.add_argument("--redeliver", type=float, default=0.0, help="share of updates posted twice")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
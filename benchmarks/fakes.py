@@ -0,0 +1,176 @@
+"""Offline stand-ins for Telegram and Postgres used by the benchmark scripts."""
+import os
+import json
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:OFFLINE-BENCHMARK")
+os.environ.setdefault("WEBHOOK_URL", "https://bench.invalid")
+
+from telegram.request import BaseRequest
+
+from roster import Roster
+from state_backend import MemoryBackend
+
+
+class FakeTelegramRequest(BaseRequest):
+    """Answers every Bot API call locally and records (method, parameters)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.calls.append((name, params))
+
+        if name == "getMe":
+            result: Any = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif name in ("sendMessage", "sendDocument", "editMessageText"):
+            result = {
+                "message_id": params.get("message_id", 1),
+                "date": 0,
+                "chat": {"id": params.get("chat_id", 1), "type": "group"},
+                "text": params.get("text", ""),
+            }
+        elif name == "getWebhookInfo":
+            result = {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    def count(self, name: str) -> int:
+        return sum(1 for call, _ in self.calls if call == name)
+
+
+class FakeDatabase:
+    """Drop-in for db.Database that answers every query with no rows."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.statements = 0
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def fetchall(self, sql, params=None):
+        await self._io(1)
+        return []
+
+    async def execute(self, sql, params=None):
+        await self._io(1)
+        return 0
+
+    async def execute_many(self, statements):
+        await self._io(len(statements))
+
+    async def run(self, fn, label="run"):
+        await self._io(1)
+        return None
+
+    async def connect(self, autocommit=True):
+        raise ConnectionError("FakeDatabase does not support LISTEN")
+
+    async def _io(self, statements: int):
+        self.statements += statements
+        await asyncio.sleep(self.latency)
+
+    def stats(self):
+        return {"statements": self.statements}
+
+
+class RemoteBackend(MemoryBackend):
+    """MemoryBackend behind a simulated round trip, like a read-modify-write on a remote store.
+
+    Every join/leave copies the roster, waits ``latency`` seconds, applies the change
+    to the copy and writes it back. Only TeamManager.lock stops concurrent changes
+    from overwriting each other; MemoryBackend itself never awaits mid-change, so it
+    can't show a missing lock.
+    """
+
+    def __init__(self, latency: float = 0.001):
+        super().__init__()
+        self.latency = latency
+
+    async def _round_trip(self, team_manager, change):
+        copy = Roster()
+        copy.load(list(team_manager.roster.main_entries()), list(team_manager.roster.reserve_entries()))
+        await asyncio.sleep(self.latency)
+        result = change(copy)
+        team_manager.roster.load(list(copy.main_entries()), list(copy.reserve_entries()))
+        team_manager.mark_changed()
+        return result
+
+    async def join(self, team_manager, entry):
+        return await self._round_trip(team_manager, lambda roster: roster.join(entry, team_manager.max_players))
+
+    async def leave(self, team_manager, user_id):
+        return await self._round_trip(team_manager, lambda roster: roster.leave(user_id))
+
+
+def install(bot_module, telegram: FakeTelegramRequest, database: FakeDatabase):
+    """Points an imported football_bot module at the fakes."""
+    instrumented = bot_module.InstrumentedRequest(telegram)
+    bot_module.telegram_app.bot._request = (instrumented, instrumented)
+    bot_module.db = database
+    bot_module.roster_store.db = database
+    bot_module.admin_manager.db = database
+    bot_module.admin_sync.db = database
+    bot_module.job_scheduler.db = database
+    if bot_module.pending_inputs.db is not None:
+        bot_module.pending_inputs.db = database
+
+
+# === Synthetic updates ===
+_ids = itertools.count(1)
+
+
+def _user(user_id: int, username: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": user_id, "is_bot": False, "first_name": f"Player{user_id}", "username": username or f"player{user_id}",
+    }
+
+
+def _chat(chat_id: int) -> Dict[str, Any]:
+    return {"id": chat_id, "type": "group", "title": "Bench"}
+
+
+def command_update(user_id: int, text: str, chat_id: int = -100, username: Optional[str] = None) -> Dict[str, Any]:
+    message: Dict[str, Any] = {
+        "message_id": next(_ids), "date": 0, "chat": _chat(chat_id), "from": _user(user_id, username), "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": next(_ids), "message": message}
+
+
+def callback_update(
+    user_id: int, data: str, chat_id: int = -100, message_id: int = 1, username: Optional[str] = None
+) -> Dict[str, Any]:
+    return {
+        "update_id": next(_ids),
+        "callback_query": {
+            "id": str(next(_ids)),
+            "from": _user(user_id, username),
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {"message_id": message_id, "date": 0, "chat": _chat(chat_id), "text": "roster"},
+        },
+    }
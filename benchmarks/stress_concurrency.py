@@ -0,0 +1,96 @@
+"""Stress test: thousands of concurrent join/leave taps against /webhook.
+
+Every simulated user sends a random sequence of add/remove taps; users run
+concurrently with each other and the update workers process them in parallel.
+Afterwards the roster must satisfy the capacity and promotion invariants and
+contain exactly the users whose last tap was "add".
+
+Roster changes go through fakes.RemoteBackend, which awaits a round trip in the
+middle of every change, so taps really interleave there. ``--no-lock`` replaces
+the per-event lock with a no-op to show that the checks then fail.
+
+    python -m benchmarks.stress_concurrency --users 500 --taps 6
+    python -m benchmarks.stress_concurrency --no-lock   # expected to fail
+"""
+import os
+import contextlib
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+os.environ.setdefault("UPDATE_WORKERS", "64")
+os.environ.setdefault("UPDATE_QUEUE_SIZE", "100000")
+
+import httpx
+
+from benchmarks import fakes
+
+import football_bot
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def run(users: int, taps: int, max_players: int, seed: int, lock: bool = True) -> bool:
+    rng = random.Random(seed)
+    telegram = fakes.FakeTelegramRequest(latency=0.001)
+    fakes.install(football_bot, telegram, fakes.FakeDatabase(latency=0.001))
+    football_bot.event_registry.backend = fakes.RemoteBackend(latency=0.001)
+    chat_id = -100
+
+    plans = {uid: [rng.choice(("add", "remove")) for _ in range(taps)] for uid in range(1, users + 1)}
+
+    async with football_bot.app.router.lifespan_context(football_bot.app):
+        team_manager = await football_bot.event_registry.get(chat_id)
+        await team_manager.set_max_players(max_players)
+        if not lock:
+            team_manager.lock = contextlib.nullcontext()
+
+        transport = httpx.ASGITransport(app=football_bot.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def tap(uid, actions):
+                for action in actions:
+                    response = await client.post("/webhook", json=fakes.callback_update(uid, action, chat_id))
+                    response.raise_for_status()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(tap(uid, actions) for uid, actions in plans.items()))
+            await football_bot.update_queue.drain()
+            elapsed = time.perf_counter() - started
+
+        roster = team_manager.roster
+        main = [player.user_id for player in roster.main_entries()]
+        reserve = [player.user_id for player in roster.reserve_entries()]
+        expected = {uid for uid, actions in plans.items() if actions[-1] == "add"}
+
+        checks = {
+            "main team within capacity": len(main) <= max_players,
+            "reserve only used when main is full": not reserve or len(main) == max_players,
+            "nobody listed twice": len(set(main) | set(reserve)) == len(main) + len(reserve),
+            "counts match the index": (roster.main_count, roster.reserve_count) == (len(main), len(reserve)),
+            "members are exactly the users whose last tap was add": set(main) | set(reserve) == expected,
+        }
+
+    updates = users * taps
+    print(f"{updates} updates from {users} users in {elapsed:.2f}s ({updates / elapsed:.0f} updates/s)")
+    print(f"main={len(main)}/{max_players} reserve={len(reserve)}")
+    for name, ok in checks.items():
+        print(f"  {'✅' if ok else '❌'} {name}")
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--taps", type=int, default=6)
+    parser.add_argument("--max-players", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-lock", dest="lock", action="store_false", help="disable the per-event lock")
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.users, args.taps, args.max_players, args.seed, args.lock))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
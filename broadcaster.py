@@ -0,0 +1,218 @@
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from edit_scheduler import ChatBuckets, TokenBucket, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+BLOCKED = "blocked"  # the user never started the bot, or blocked it
+FAILED = "failed"
+
+
+class Broadcast:
+    """Delivery status of one message fanned out to many users."""
+
+    def __init__(self, broadcast_id: int, label: str, user_ids: List[int]):
+        self.id = broadcast_id
+        self.label = label
+        self.status: Dict[int, str] = dict.fromkeys(user_ids, PENDING)
+        self.pending = len(self.status)
+        self.retries = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys((SENT, BLOCKED, FAILED, PENDING), 0)
+        for status in self.status.values():
+            counts[status] += 1
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished or time.monotonic()
+        return {"id": self.id, "label": self.label, **self.counts(), "retries": self.retries,
+                "seconds": round(end - self.started, 2)}
+
+
+class Delivery:
+    __slots__ = ("broadcast", "chat_id", "text", "parse_mode", "attempt")
+
+    def __init__(self, broadcast: Broadcast, chat_id: int, text: str, parse_mode: Optional[str]):
+        self.broadcast = broadcast
+        self.chat_id = chat_id
+        self.text = text
+        self.parse_mode = parse_mode
+        self.attempt = 0
+
+
+class Broadcaster:
+    """Fans a message out as DMs to many users without blocking the caller.
+
+    ``broadcast`` only enqueues; ``concurrency`` worker tasks send. Every send
+    takes a token from a global bucket (Telegram allows about 30 messages per
+    second per bot) and from the recipient's own bucket. RetryAfter pauses the
+    chat and, since flood control is per bot, the global bucket too. Network
+    errors are retried with exponential backoff plus jitter, up to
+    ``max_attempts``; retries are re-queued after their delay, so they never
+    hold a worker. Users who haven't started the bot can't be messaged and are
+    recorded as blocked. The status of recent broadcasts is kept for
+    /metrics.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        concurrency: int = 16,
+        global_rate: float = 25.0,
+        rate_per_chat: float = 1.0,
+        max_attempts: int = 4,
+        backoff: float = 1.0,
+        max_history: int = 50,
+    ):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.rate_per_chat = rate_per_chat
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_history = max_history
+
+        # A small burst, so no one-second window goes far beyond global_rate.
+        self._global = TokenBucket(global_rate, max(1.0, global_rate / 5))
+        self._buckets = ChatBuckets(rate_per_chat, 1)
+        self._queue: "asyncio.Queue[Delivery]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._retry_timers: Set[asyncio.TimerHandle] = set()
+        self._history: "OrderedDict[int, Broadcast]" = OrderedDict()
+        self._next_id = 1
+
+        # Metrics
+        self.sent = 0
+        self.blocked = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+
+    # === Lifecycle ===
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for timer in self._retry_timers:
+            timer.cancel()
+        self._retry_timers.clear()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue.qsize():
+            logger.warning(f"⚠️ Dropped {self._queue.qsize()} undelivered broadcast messages on shutdown")
+
+    # === Broadcasting ===
+    def broadcast(self, user_ids: Iterable[int], text: str, parse_mode: Optional[str] = "HTML",
+                  label: str = "broadcast") -> Broadcast:
+        """Queues ``text`` for every user once and returns its (live) delivery status."""
+        broadcast = Broadcast(self._next_id, label, list(dict.fromkeys(user_ids)))
+        self._next_id += 1
+        self._history[broadcast.id] = broadcast
+        if len(self._history) > self.max_history:
+            self._history.popitem(last=False)
+        for user_id in broadcast.status:
+            self._queue.put_nowait(Delivery(broadcast, user_id, text, parse_mode))
+        if not broadcast.pending:
+            broadcast.finished = broadcast.started
+        logger.info(f"📣 Broadcast {broadcast.id} ({label}) queued for {broadcast.pending} users")
+        return broadcast
+
+    async def _worker(self):
+        while True:
+            delivery = await self._queue.get()
+            try:
+                await self._wait_for_token(self._buckets.get(delivery.chat_id))
+                await self._wait_for_token(self._global)
+                await self._send(delivery)
+            except Exception as e:
+                # Never let one bad delivery kill the worker.
+                logger.error(f"❌ Broadcast delivery to {delivery.chat_id} crashed: {e}")
+                self._finish(delivery, FAILED)
+
+    @staticmethod
+    async def _wait_for_token(bucket: TokenBucket):
+        delay = bucket.delay()
+        while delay:
+            await asyncio.sleep(delay)
+            delay = bucket.delay()
+
+    async def _send(self, delivery: Delivery):
+        delivery.attempt += 1
+        try:
+            await self.bot.send_message(delivery.chat_id, delivery.text, parse_mode=delivery.parse_mode)
+        except RetryAfter as e:
+            self.throttled += 1
+            seconds = retry_after_seconds(e.retry_after)
+            self._buckets.get(delivery.chat_id).block(seconds)
+            self._global.block(seconds)
+            # Flood control isn't the message's fault, so it doesn't use up an attempt.
+            delivery.attempt -= 1
+            self._retry(delivery, seconds)
+        except Forbidden:
+            self._finish(delivery, BLOCKED)
+        except BadRequest as e:
+            logger.warning(f"⚠️ Broadcast to {delivery.chat_id} rejected: {e}")
+            self._finish(delivery, FAILED)
+        except NetworkError as e:
+            if delivery.attempt >= self.max_attempts:
+                logger.warning(f"⚠️ Broadcast to {delivery.chat_id} failed after {delivery.attempt} attempts: {e}")
+                self._finish(delivery, FAILED)
+            else:
+                self._retry(delivery, self.backoff * 2 ** (delivery.attempt - 1) * random.uniform(0.5, 1.5))
+        else:
+            self._finish(delivery, SENT)
+
+    def _retry(self, delivery: Delivery, delay: float):
+        self.retried += 1
+        delivery.broadcast.retries += 1
+
+        def requeue():
+            self._retry_timers.discard(timer)
+            self._queue.put_nowait(delivery)
+
+        timer = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_timers.add(timer)
+
+    def _finish(self, delivery: Delivery, status: str):
+        broadcast = delivery.broadcast
+        if broadcast.status.get(delivery.chat_id) != PENDING:
+            return
+        broadcast.status[delivery.chat_id] = status
+        broadcast.pending -= 1
+        if status == SENT:
+            self.sent += 1
+        elif status == BLOCKED:
+            self.blocked += 1
+        else:
+            self.failed += 1
+        if not broadcast.pending:
+            broadcast.finished = time.monotonic()
+            logger.info(f"📣 Broadcast {broadcast.id} ({broadcast.label}) done: {broadcast.summary()}")
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry_timers),
+            "sent": self.sent,
+            "blocked": self.blocked,
+            "failed": self.failed,
+            "retried": self.retried,
+            "throttled": self.throttled,
+            "recent": [broadcast.summary() for broadcast in reversed(self._history.values())][:10],
+        }
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+from psycopg2 import pool
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Statement = Tuple[str, Optional[Sequence[Any]]]
+
+
+class Database:
+    """Bounded psycopg2 connection pool with an async API.
+
+    Every blocking driver call runs on a dedicated thread pool sized to the
+    connection pool, so handlers awaiting the database never stall the event loop.
+    The pool itself is created lazily on first use and retried on the next call if
+    the database was unreachable.
+    """
+
+    def __init__(self, minconn: int = 1, maxconn: int = 5, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.connect_kwargs = connect_kwargs
+
+        self._pool: Optional[pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=maxconn, thread_name_prefix="db")
+        self._slots = asyncio.Semaphore(maxconn)
+
+        # Metrics
+        self.in_use = 0
+        self.waiting = 0
+        self.acquires = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        return cls(
+            minconn=int(os.getenv("DB_POOL_MIN", 1)),
+            maxconn=int(os.getenv("DB_POOL_MAX", 5)),
+            dbname=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+            sslmode="require",
+        )
+
+    # === Lifecycle ===
+    async def open(self):
+        """Eagerly creates the pool so the first request doesn't pay for the handshake."""
+        await self._run_in_executor(self._get_pool)
+
+    async def close(self):
+        await self._run_in_executor(self._close_pool)
+        self._executor.shutdown(wait=False)
+
+    async def connect(self, autocommit: bool = True):
+        """Opens a dedicated connection outside the pool, e.g. for LISTEN."""
+        def connect():
+            conn = psycopg2.connect(**self.connect_kwargs)
+            conn.autocommit = autocommit
+            return conn
+        return await self._run_in_executor(connect)
+
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self.connect_kwargs)
+                logger.info(f"🗄 Database pool opened ({self.minconn}-{self.maxconn} connections)")
+            return self._pool
+
+    def _close_pool(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                logger.info("🗄 Database pool closed")
+
+    # === Queries ===
+    async def fetchall(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[tuple]:
+        def run(cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        return await self.run(run, label="fetchall")
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        def run(cursor):
+            cursor.execute(sql, params)
+            return cursor.rowcount
+        return await self.run(run, label="execute")
+
+    async def execute_many(self, statements: List[Statement]):
+        """Runs several statements in a single transaction and a single round-trip."""
+        if not statements:
+            return
+
+        def run(cursor):
+            batch = b";\n".join(cursor.mogrify(sql, params) for sql, params in statements)
+            cursor.execute(batch)
+        await self.run(run, label="execute_many")
+
+    async def run(self, fn: Callable[[Any], Any], label: str = "run") -> Any:
+        """Calls ``fn(cursor)`` on a pooled connection inside one transaction.
+
+        The call's duration, including the wait for a connection, is recorded
+        in the ``db`` latency histogram under ``label``.
+        """
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.acquires += 1
+        self.acquire_wait_total += waited
+        self.acquire_wait_max = max(self.acquire_wait_max, waited)
+
+        self.in_use += 1
+        try:
+            return await self._run_in_executor(self._run_with_connection, fn)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+            metrics.observe("db", label, time.perf_counter() - started)
+
+    def _run_with_connection(self, fn: Callable[[Any], Any]) -> Any:
+        db_pool = self._get_pool()
+        conn = db_pool.getconn()
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    return fn(cursor)
+        finally:
+            db_pool.putconn(conn, close=bool(conn.closed))
+
+    async def _run_in_executor(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        avg_wait = self.acquire_wait_total / self.acquires if self.acquires else 0.0
+        return {
+            "pool_min": self.minconn,
+            "pool_max": self.maxconn,
+            "pool_open": self._pool is not None,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "acquire_wait_avg_ms": round(avg_wait * 1000, 3),
+            "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 3),
+            "errors": self.errors,
+        }
@@ -0,0 +1,222 @@
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+
+
+class TokenBucket:
+    """Classic token bucket; ``blocked_until`` additionally honors Telegram's retry_after."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self) -> float:
+        """Seconds to wait before a token is available (0 if one was taken now)."""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class ChatBuckets:
+    """One TokenBucket per chat, created on first use; beyond ``max_chats`` the least
+    recently used is dropped (it would be full again by then anyway)."""
+
+    def __init__(self, rate: float, capacity: float, max_chats: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_chats = max_chats
+        self._buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+
+    def get(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.capacity)
+            if len(self._buckets) > self.max_chats:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(chat_id)
+        return bucket
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def retry_after_seconds(retry_after: Any) -> float:
+    """RetryAfter.retry_after in seconds (a timedelta or a number, depending on PTB settings)."""
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class PendingEdit:
+    __slots__ = ("text", "reply_markup", "parse_mode")
+
+    def __init__(self, text: str, reply_markup: Optional[InlineKeyboardMarkup], parse_mode: Optional[str]):
+        self.text = text
+        self.reply_markup = reply_markup
+        self.parse_mode = parse_mode
+
+    def digest(self) -> bytes:
+        markup = repr(self.reply_markup.to_dict()) if self.reply_markup else ""
+        return hashlib.blake2b(f"{self.parse_mode}\0{self.text}\0{markup}".encode(), digest_size=16).digest()
+
+
+class EditScheduler:
+    """Debounced, rate-limited ``edit_message_text`` for frequently changing messages.
+
+    Edits scheduled for the same (chat_id, message_id) within ``debounce``
+    seconds collapse into one that sends the latest content. An edit whose
+    content hash matches what was last sent is skipped, each chat draws from its
+    own token bucket, and a RetryAfter from Telegram pauses that chat for the
+    requested time before the edit is retried.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        debounce: float = 0.3,
+        rate_per_chat: float = 1.0,
+        burst_per_chat: float = 3.0,
+        max_tracked: int = 10000,
+    ):
+        self.bot = bot
+        self.debounce = debounce
+        self.rate_per_chat = rate_per_chat
+        self.burst_per_chat = burst_per_chat
+        self.max_tracked = max_tracked
+
+        self._pending: Dict[MessageKey, PendingEdit] = {}
+        self._tasks: Dict[MessageKey, asyncio.Task] = {}
+        self._last_sent: "OrderedDict[MessageKey, bytes]" = OrderedDict()
+        self._buckets = ChatBuckets(rate_per_chat, burst_per_chat, max_tracked)
+
+        # Metrics
+        self.scheduled = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.throttled = 0
+        self.failed = 0
+
+    def schedule(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        parse_mode: Optional[str] = "HTML",
+    ):
+        """Queues an edit; only the most recent content per message is sent."""
+        key = (chat_id, message_id)
+        self.scheduled += 1
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = PendingEdit(text, reply_markup, parse_mode)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def discard(self, chat_id: int, message_id: int):
+        """Drops any pending edit for a message that is about to be edited directly."""
+        key = (chat_id, message_id)
+        self._pending.pop(key, None)
+        self._last_sent.pop(key, None)
+
+    async def stop(self):
+        """Cancels the debounce timers and sends whatever is still pending once, right away."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        for key in list(self._pending):
+            edit = self._pending.pop(key, None)
+            if edit is not None:
+                await self._send(key, edit)
+        self._pending.clear()
+
+    async def _run(self, key: MessageKey):
+        try:
+            await asyncio.sleep(self.debounce)
+            while key in self._pending:
+                delay = self._buckets.get(key[0]).delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+                await self._send(key, self._pending.pop(key))
+        finally:
+            del self._tasks[key]
+
+    async def _send(self, key: MessageKey, edit: PendingEdit):
+        chat_id, message_id = key
+        digest = edit.digest()
+        if self._last_sent.get(key) == digest:
+            self.unchanged += 1
+            return
+        try:
+            await self.bot.edit_message_text(
+                edit.text,
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=edit.reply_markup,
+                parse_mode=edit.parse_mode,
+            )
+        except RetryAfter as e:
+            self.throttled += 1
+            self._buckets.get(chat_id).block(retry_after_seconds(e.retry_after))
+            # Retry with this content unless a newer edit arrived meanwhile.
+            self._pending.setdefault(key, edit)
+            return
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                self.unchanged += 1
+                self._remember(key, digest)
+            else:
+                self.failed += 1
+                logger.warning(f"⚠️ Failed to edit message {key}: {e}")
+            return
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Failed to edit message {key}: {e}")
+            return
+
+        self.sent += 1
+        self._remember(key, digest)
+
+    def _remember(self, key: MessageKey, digest: bytes):
+        self._last_sent[key] = digest
+        self._last_sent.move_to_end(key)
+        if len(self._last_sent) > self.max_tracked:
+            self._last_sent.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "unchanged": self.unchanged,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "pending": len(self._pending),
+        }
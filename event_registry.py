@@ -0,0 +1,122 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from scheduler import EventSchedule
+from state_backend import StateBackend
+from roster import Player
+from team_manager import TeamManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT = "default"
+
+EventKey = Tuple[int, str]
+
+
+class EventRegistry:
+    """Per-chat, per-event TeamManager instances.
+
+    Events are created and loaded from the backend on first access and kept in
+    LRU order; later accesses let the backend sync in changes made by other
+    processes. Events idle for longer than ``idle_ttl`` seconds, or beyond
+    ``max_events``, are evicted; their writes are already persisted by the
+    backend, so a later access simply reloads them.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        max_events: int = 1000,
+        idle_ttl: float = 6 * 3600,
+        schedule: Optional[EventSchedule] = None,
+        on_promote: Optional[Callable[[TeamManager, Player], None]] = None,
+    ):
+        self.backend = backend
+        self.schedule = schedule
+        self.on_promote = on_promote
+        self.max_events = max_events
+        self.idle_ttl = idle_ttl
+        self._events: "OrderedDict[EventKey, TeamManager]" = OrderedDict()
+        self._last_access: Dict[EventKey, float] = {}
+        self._loading: Dict[EventKey, asyncio.Future] = {}
+
+        # Metrics
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def event_id(chat_id: int, event_key: str = DEFAULT_EVENT) -> str:
+        return f"{chat_id}:{event_key}"
+
+    async def get(self, chat_id: int, event_key: str = DEFAULT_EVENT) -> TeamManager:
+        key = (chat_id, event_key)
+        now = time.monotonic()
+
+        team_manager = self._events.get(key)
+        if team_manager is not None:
+            self.hits += 1
+            self._touch(key, now)
+            await team_manager.sync()
+            return team_manager
+
+        # Several updates for a cold event can arrive together; load it only once.
+        loading = self._loading.get(key)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        loading = self._loading[key] = asyncio.get_running_loop().create_future()
+        try:
+            team_manager = TeamManager(self.backend, self.event_id(chat_id, event_key), self.schedule, self.on_promote)
+            await team_manager.load_state()
+            self.loads += 1
+            self._events[key] = team_manager
+            self._touch(key, now)
+            self._evict(now)
+            loading.set_result(team_manager)
+            return team_manager
+        except Exception as e:
+            loading.set_exception(e)
+            # Nobody else may be waiting, so don't let the future complain about an unretrieved error.
+            loading.exception()
+            raise
+        except BaseException:
+            loading.cancel()
+            raise
+        finally:
+            del self._loading[key]
+
+    def _touch(self, key: EventKey, now: float):
+        self._events.move_to_end(key)
+        self._last_access[key] = now
+
+    def _evict(self, now: float):
+        # The OrderedDict is kept in access order, so the oldest entries are always at the front.
+        # An event whose lock is held is mid-mutation; keep it and look at the next one.
+        for _ in range(len(self._events)):
+            key = next(iter(self._events))
+            expired = now - self._last_access[key] > self.idle_ttl
+            if not expired and len(self._events) <= self.max_events:
+                break
+            if self._events[key].lock.locked():
+                self._events.move_to_end(key)
+                continue
+            del self._events[key]
+            del self._last_access[key]
+            self.evictions += 1
+            logger.info(f"🧊 Evicted idle event {self.event_id(*key)}")
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": len(self._events),
+            "max_events": self.max_events,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
@@ -1,17 +1,41 @@
+import time
+IMPORT_STARTED_AT = time.perf_counter()  # start of the "import" startup phase
+
 import os
+import hmac
 import logging
 import asyncio
+from html import escape
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
-from contextlib import asynccontextmanager
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager, contextmanager
+from telegram import InputFile, Update
+from telegram.request import HTTPXRequest
 from telegram.ext import (
     Application,
     CommandHandler,
     CallbackQueryHandler,
     ContextTypes,
 )
+from db import Database
+from roster_store import RosterStore
+from state_backend import MemoryBackend, PostgresBackend
+from admin_manager import AdminManager, admins_to_csv, usernames_from_csv
+from admin_sync import AdminSync
+from pending_input import AwaitingInputFilter, PendingInputStore
+from event_registry import EventRegistry
+from scheduler import LOCK, RESET, EventSchedule, Job, JobScheduler, parse_duration
+from update_queue import RecentUpdateIds, UpdateQueue
+from edit_scheduler import EditScheduler
+from broadcaster import Broadcaster
+from keyboards import AdminListKeyboard, main_keyboard, paged_main_keyboard, settings_keyboard
+from instrumented_request import InstrumentedRequest
+from metrics import metrics, setup_logging
 from team_manager import TeamManager  # import your TeamManager class
+from roster import Player, identities
 from telegram.ext import MessageHandler, filters
 
 load_dotenv()
@@ -19,246 +43,603 @@ load_dotenv()
 # === Setup ===
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # e.g., https://yourapp.onrender.com
+# Telegram echoes this in X-Telegram-Bot-Api-Secret-Token; posts without it are rejected
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
 PORT = int(os.getenv("PORT", 10000))
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", 8))
+MAX_IMPORT_BYTES = 1024 * 1024  # largest CSV accepted by /importadmins
+# "memory" (single process) or "postgres" (shared by several workers/replicas)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
 
 # === Logging ===
-logging.basicConfig(level=logging.INFO)
+# Records go through a QueueHandler; a background listener thread does the actual writes
+log_listener = setup_logging(getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 logger = logging.getLogger(__name__)
 
-team_manager = TeamManager()  # create TeamManager instance
+db = Database.from_env()  # shared connection pool, opened in lifespan
+roster_store = RosterStore(db, flush_interval=float(os.getenv("ROSTER_FLUSH_INTERVAL", 0.5)))
+if STATE_BACKEND == "postgres":
+    state_backend = PostgresBackend(db, max_staleness=float(os.getenv("STATE_MAX_STALENESS", 1.0)))
+else:
+    state_backend = MemoryBackend(roster_store)
+admin_manager = AdminManager(db)
+admin_list_keyboard = AdminListKeyboard(admin_manager)
+# Admin changes made by other workers/replicas arrive via LISTEN/NOTIFY, or polling as a fallback
+admin_sync = AdminSync(admin_manager, db, poll_interval=float(os.getenv("ADMIN_POLL_INTERVAL", 30)))
+# What each user was asked to type next in the settings flows; expires after PENDING_INPUT_TTL.
+# Kept in the database with several workers (the answer may reach another one) or when asked to.
+pending_inputs = PendingInputStore(
+    db if os.getenv("PENDING_INPUT_PERSIST", "0") == "1" or STATE_BACKEND == "postgres" else None,
+    ttl=float(os.getenv("PENDING_INPUT_TTL", 600)),
+)
+# Reminders, the signup lock and the roster reset, as offsets from the parsed event date
+event_schedule = EventSchedule(
+    tz=ZoneInfo(os.getenv("EVENT_TIMEZONE", "UTC")),
+    default_time=os.getenv("EVENT_DEFAULT_TIME", "18:00"),
+    reminders=tuple(filter(None, map(parse_duration, os.getenv("REMINDER_OFFSETS", "24h,2h").split(",")))),
+    lock_before=parse_duration(os.getenv("SIGNUP_LOCK_BEFORE", "1h")),
+    reset_after=parse_duration(os.getenv("RESET_AFTER", "3h")),
+)
+# One TeamManager per (chat, event), created on first use and evicted when idle
+event_registry = EventRegistry(
+    state_backend,
+    max_events=int(os.getenv("MAX_CACHED_EVENTS", 1000)),
+    idle_ttl=float(os.getenv("EVENT_IDLE_TTL", 6 * 3600)),
+    schedule=event_schedule,
+    on_promote=lambda team_manager, entry: notify_promoted(team_manager, entry),
+)
+# Due jobs run through run_job(); they're kept in scheduled_jobs so they survive restarts
+job_scheduler = JobScheduler(
+    lambda job: run_job(job),
+    db,
+    misfire_grace=float(os.getenv("REMINDER_MISFIRE_GRACE", 3600)),
+)
 # === Telegram bot application ===
-telegram_app = Application.builder().token(TELEGRAM_TOKEN).build()
+telegram_app = (
+    Application.builder()
+    .token(TELEGRAM_TOKEN)
+    .request(InstrumentedRequest(HTTPXRequest(connection_pool_size=int(os.getenv("TELEGRAM_POOL_SIZE", 256)))))
+    .build()
+)
+# Webhook posts are acked as soon as they're queued; UPDATE_WORKERS workers call process_update
+# concurrently (PTB's own concurrent_updates only applies to its polling/webhook fetcher).
+# Roster mutations are serialized per event by TeamManager.lock.
+update_queue = UpdateQueue(
+    telegram_app.process_update,
+    workers=UPDATE_WORKERS,
+    maxsize=int(os.getenv("UPDATE_QUEUE_SIZE", 1000)),
+    enqueue_timeout=float(os.getenv("UPDATE_ENQUEUE_TIMEOUT", 1.0)),
+)
+# Redelivered updates (same update_id) are dropped before they're parsed
+recent_updates = RecentUpdateIds(
+    window=float(os.getenv("UPDATE_DEDUPE_WINDOW", 600)),
+    max_size=int(os.getenv("UPDATE_DEDUPE_SIZE", 10000)),
+)
+webhook_rejects = {"unauthorized": 0, "malformed": 0, "not_ready": 0}
+# Roster refreshes are debounced per message and rate limited per chat
+edit_scheduler = EditScheduler(
+    telegram_app.bot,
+    debounce=float(os.getenv("EDIT_DEBOUNCE", 0.3)),
+    rate_per_chat=float(os.getenv("EDIT_RATE_PER_CHAT", 1.0)),
+    burst_per_chat=float(os.getenv("EDIT_BURST_PER_CHAT", 3)),
+)
 
-# === FastAPI lifespan events ===
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    logger.info("📦 Starting up app...")
+# DMs to whole rosters (venue changes) and promoted players, rate limited globally and per chat
+broadcaster = Broadcaster(
+    telegram_app.bot,
+    concurrency=int(os.getenv("BROADCAST_CONCURRENCY", 16)),
+    global_rate=float(os.getenv("BROADCAST_RATE", 25)),
+    max_attempts=int(os.getenv("BROADCAST_MAX_ATTEMPTS", 4)),
+)
+
+# === Startup ===
+# The port binds as soon as lifespan yields; everything slow happens in warm_up() meanwhile.
+# Webhook posts are accepted and queued right away, and workers start once the bot is ready.
+# If a warm-up step fails it's retried with backoff, and webhook posts get 503 until it succeeds.
+STARTUP_MAX_ATTEMPTS = int(os.getenv("STARTUP_MAX_ATTEMPTS", 8))
+STARTUP_RETRY_DELAY = float(os.getenv("STARTUP_RETRY_DELAY", 1.0))
+startup_phases: Dict[str, float] = {}
+startup_failures = 0
+startup_error: Optional[str] = None  # set once warm-up has given up
+ready = asyncio.Event()
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases[name] = round((time.perf_counter() - started) * 1000, 1)
+
+def register_handlers():
     telegram_app.add_handler(CommandHandler("start", start))
     telegram_app.add_handler(CommandHandler("setevent", set_event))  # add setevent handler
+    telegram_app.add_handler(CommandHandler("importadmins", import_admins))
+    telegram_app.add_handler(CommandHandler("exportadmins", export_admins))
+    # A CSV sent with "/importadmins" as its caption
+    telegram_app.add_handler(
+        MessageHandler(filters.Document.ALL & filters.CaptionRegex(r"^/importadmins(@\w+)?(\s|$)"), import_admins)
+    )
     telegram_app.add_handler(CallbackQueryHandler(handle_button))
-    telegram_app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
-    await telegram_app.initialize()
-    await telegram_app.bot.set_webhook(f"{WEBHOOK_URL}/webhook")
+    # Only users we're waiting on reach handle_text; other chat messages are dropped by the filter
+    telegram_app.add_handler(
+        MessageHandler(AwaitingInputFilter(pending_inputs) & filters.TEXT & ~filters.COMMAND, handle_text)
+    )
+
+async def warm_up_database():
+    with startup_phase("db_pool"):
+        try:
+            await db.open()
+        except Exception as e:
+            logger.error(f"❌ Failed to open database pool: {e}")
+    with startup_phase("admin_cache"):
+        await admin_sync.start()
+    with startup_phase("jobs"):
+        await job_scheduler.start()
+
+async def initialize_telegram():
+    with startup_phase("telegram_init"):
+        await telegram_app.initialize()
+
+async def with_retries(name: str, step):
+    """Runs a warm-up step until it succeeds, doubling the delay between attempts (max 60s)."""
+    global startup_failures
+    delay = STARTUP_RETRY_DELAY
+    for attempt in range(1, STARTUP_MAX_ATTEMPTS + 1):
+        try:
+            return await step()
+        except Exception as e:
+            startup_failures += 1
+            if attempt == STARTUP_MAX_ATTEMPTS:
+                raise
+            logger.warning(f"⚠️ Startup step {name} failed (attempt {attempt}), retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+async def sync_webhook():
+    """Registers the webhook unless Telegram already points at it."""
+    url = f"{WEBHOOK_URL}/webhook"
+    # getWebhookInfo doesn't reveal the secret token, so with one configured always re-register.
+    if not WEBHOOK_SECRET:
+        info = await telegram_app.bot.get_webhook_info()
+        if info.url == url:
+            logger.info("✅ Webhook already set")
+            return
+    await telegram_app.bot.set_webhook(url, secret_token=WEBHOOK_SECRET or None)
     logger.info("✅ Webhook set")
+
+async def warm_up():
+    global startup_error
+    try:
+        with startup_phase("warm_up"):
+            register_handlers()
+            await asyncio.gather(warm_up_database(), with_retries("telegram_init", initialize_telegram))
+            update_queue.start()
+            broadcaster.start()
+            ready.set()
+            with startup_phase("webhook"):
+                await with_retries("webhook", sync_webhook)
+        logger.info(f"🚀 Startup phases (ms): {startup_phases}")
+    except Exception as e:
+        startup_error = str(e) or type(e).__name__
+        logger.exception(f"❌ Startup failed for good, {update_queue.stats()['depth']} queued updates won't be processed: {e}")
+
+# === FastAPI lifespan events ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_phases["import"] = round((time.perf_counter() - IMPORT_STARTED_AT) * 1000, 1)
+    logger.info("📦 Starting up app...")
+    roster_store.start()
+    warm_up_task = asyncio.create_task(warm_up())
     yield
     logger.info("🧹 Shutting down app...")
+    if not warm_up_task.done():
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    await update_queue.stop()
+    await job_scheduler.stop()
+    await broadcaster.stop()
+    await edit_scheduler.stop()
     await telegram_app.shutdown()
+    await roster_store.stop()
+    await admin_sync.stop()
+    await db.close()
+    log_listener.stop()
 
 # === FastAPI app ===
 app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def health_check():
-    return {"status": "ok", "message": "🤖 Bot is alive!"}
+    if startup_error:
+        return JSONResponse(
+            {"status": "failed", "message": f"❌ Startup failed: {startup_error}", "ready": False}, status_code=503
+        )
+    return {"status": "ok", "message": "🤖 Bot is alive!", "ready": ready.is_set()}
+
+@app.get("/metrics")
+async def get_metrics():
+    return {
+        "db": db.stats(),
+        "roster_store": roster_store.stats(),
+        "state_backend": state_backend.stats(),
+        "events": event_registry.stats(),
+        "identities": identities.stats(),
+        "update_queue": update_queue.stats(),
+        "webhook": {**recent_updates.stats(), **webhook_rejects},
+        "edits": edit_scheduler.stats(),
+        "admins": admin_sync.stats(),
+        "pending_inputs": pending_inputs.stats(),
+        "jobs": job_scheduler.stats(),
+        "broadcasts": broadcaster.stats(),
+        "latency": metrics.snapshot(),
+        "startup_ms": startup_phases,
+        "startup_failures": startup_failures,
+    }
+
+def reject_malformed(error: Exception) -> Response:
+    webhook_rejects["malformed"] += 1
+    logger.warning(f"⚠️ Rejected malformed update: {error}")
+    return Response(status_code=400)
 
 @app.post("/webhook")
 async def telegram_webhook(request: Request):
-    data = await request.json()
-    update = Update.de_json(data, telegram_app.bot)
-    await telegram_app.process_update(update)
+    # Checked before the body is even read
+    if WEBHOOK_SECRET and not hmac.compare_digest(
+        request.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode(), WEBHOOK_SECRET.encode()
+    ):
+        webhook_rejects["unauthorized"] += 1
+        return Response(status_code=403)
+    # Warm-up is retrying or gave up: nothing would process the update, so have Telegram keep it
+    if not ready.is_set() and (startup_failures or startup_error):
+        webhook_rejects["not_ready"] += 1
+        return Response(status_code=503, headers={"Retry-After": "5"})
+
+    try:
+        data = await request.json()
+        update_id = int(data["update_id"])
+    except Exception as e:
+        return reject_malformed(e)
+    if recent_updates.check_and_add(update_id):
+        return {"ok": True}  # a redelivery of an update we already accepted
+    try:
+        update = Update.de_json(data, telegram_app.bot)
+    except Exception as e:
+        recent_updates.forget(update_id)
+        return reject_malformed(e)
+
+    if not await update_queue.submit(update):
+        # Queue is full: shed the update and let Telegram redeliver it later
+        recent_updates.forget(update_id)
+        logger.warning(f"⚠️ Update queue full, shedding update {update.update_id}")
+        return Response(status_code=503, headers={"Retry-After": "1"})
     return {"ok": True}
 
 # === Telegram Bot Handlers ===
-def get_team_message():
-    if team_manager.main_team or team_manager.reserve_team:
-        members = []
-        for i, (_, name, username) in enumerate(team_manager.main_team, 1):
-            members.append(f"{i}. {name} (@{username})")
-        main_list = "\n".join(members) if members else "No team members yet."
-
-        reserve_list = ""
-        if team_manager.reserve_team:
-            reserve_members = [
-                f"{i}. {name} (@{username})" for i, (_, name, username) in enumerate(team_manager.reserve_team, 1)
-            ]
-            reserve_list = "\n\n🕒 <b>Reserve List:</b>\n" + "\n".join(reserve_members)
-
-        return (
-            f"👥 <b>Current Team Members (Max {team_manager.max_players}):</b>\n"
-            f"{main_list}"
-            f"{reserve_list}\n\n"
-            f"📅 Event Date: {team_manager.event_date}\n"
-            f"📍 Venue: {team_manager.venue}"
+async def get_team_manager(update: Update) -> TeamManager:
+    """Returns the event of the chat the update came from."""
+    return await event_registry.get(update.effective_chat.id)
+
+async def schedule_event_jobs(update: Update, team_manager: TeamManager):
+    """(Re)schedules the event's reminders, signup lock and reset after its date changed."""
+    jobs = event_schedule.jobs_for(team_manager.event_time)
+    await job_scheduler.replace_event_jobs(team_manager.event_id, update.effective_chat.id, jobs)
+    if team_manager.event_time is None:
+        await update.message.reply_text(
+            "ℹ️ I couldn't read that as a date (try 2025-06-01 19:00), so no reminders are scheduled."
         )
-    return "👥 <b>The team is currently empty.</b>"
-
-def generate_buttons(user_id, username):
-    is_admin = team_manager.is_admin( username=username)
-    print("Is Admin")
-    print(is_admin)
-    is_super_admin = team_manager.is_super_admin(user_id=user_id, username=username)
-    in_main_team = any(member_id == user_id for member_id, _, _ in team_manager.main_team)
-    
-    buttons = []
 
-    if in_main_team:
-        buttons.append([InlineKeyboardButton("➖ Remove Me", callback_data="remove")])
+def notify_roster(team_manager: TeamManager, text: str, label: str) -> int:
+    """DMs everyone on the main team and reserve list; returns how many were queued."""
+    user_ids = [player.user_id for player in team_manager.roster.main_entries()]
+    user_ids += [player.user_id for player in team_manager.roster.reserve_entries()]
+    if user_ids:
+        broadcaster.broadcast(user_ids, text, label=f"{label}:{team_manager.event_id}")
+    return len(user_ids)
+
+def notify_promoted(team_manager: TeamManager, player: Player):
+    broadcaster.broadcast(
+        [player.user_id],
+        f"🎉 A spot opened up: you've been moved from the reserve list to the main team "
+        f"(📅 {escape(team_manager.event_date)}, 📍 {escape(team_manager.venue)}).",
+        label=f"promotion:{team_manager.event_id}",
+    )
+
+async def announce_venue(update: Update, team_manager: TeamManager, old_venue: str):
+    if team_manager.venue == old_venue:
+        return
+    notified = notify_roster(
+        team_manager,
+        f"📍 <b>Venue changed</b> to {escape(team_manager.venue)} (📅 {escape(team_manager.event_date)}).",
+        "venue",
+    )
+    if notified:
+        await update.message.reply_text(f"📣 Notifying {notified} players.")
+
+async def run_job(job: Job):
+    """Posts a scheduled reminder or signup-lock notice, or the final roster before resetting it."""
+    event_key = job.event_id.split(":", 1)[1]
+    team_manager = await event_registry.get(job.chat_id, event_key)
+    # The date may have changed since this job was scheduled (e.g. through another worker)
+    due = dict(event_schedule.jobs_for(team_manager.event_time)).get(job.kind)
+    if due is None or abs(due - job.due) > 1:
+        logger.info(f"⏰ Dropped outdated {job.kind} job for {job.event_id}")
+        return
+
+    if job.kind == RESET:
+        # One message per roster page keeps each under Telegram's length limit. The roster is
+        # only cleared once every page is posted, so a failed send doesn't lose it.
+        title = f"📦 <b>Final roster for {team_manager.event_date}</b>\n\n"
+        pages = [team_manager.get_team_message(page) for page in range(team_manager.page_count())]
+        for page_text in pages:
+            await telegram_app.bot.send_message(job.chat_id, title + page_text, parse_mode="HTML")
+        await team_manager.clear_teams()
+        logger.info(f"📦 Archived and reset roster of {job.event_id}")
+        return
+
+    if job.kind == LOCK:
+        text = f"🔒 <b>Signups are closed.</b>\n\n{team_manager.get_team_message()}"
     else:
-        buttons.append([InlineKeyboardButton("➕ Add Me", callback_data="add")])
+        text = (
+            f"⏰ <b>Reminder:</b> game on {team_manager.event_date} at {team_manager.venue}.\n\n"
+            f"{team_manager.get_team_message()}"
+        )
+    await telegram_app.bot.send_message(job.chat_id, text, parse_mode="HTML")
 
-    buttons.append([InlineKeyboardButton("👥 Show Team", callback_data="team")])
+async def schedule_roster_edit(query, text, reply_markup):
+    """Refreshes the roster message through the edit scheduler, so bursts of taps coalesce."""
+    if query.message is None:  # inline messages can't be addressed by chat/message id
+        await edit_query_message(query, text, reply_markup=reply_markup, parse_mode="HTML")
+        return
+    edit_scheduler.schedule(query.message.chat.id, query.message.message_id, text, reply_markup=reply_markup)
+
+async def edit_query_message(query, text, **kwargs):
+    """Edits the tapped message right away, superseding any roster edit still scheduled for it."""
+    if query.message is not None:
+        edit_scheduler.discard(query.message.chat.id, query.message.message_id)
+    await query.edit_message_text(text, **kwargs)
+
+def get_roles(user_id, username) -> Tuple[bool, bool]:
+    """Resolves (is_admin, is_super_admin) once per update."""
+    return (
+        admin_manager.is_admin(username=username),
+        admin_manager.is_super_admin(user_id=user_id, username=username),
+    )
 
-    if is_admin:
-        buttons.append([InlineKeyboardButton("⚙️ Settings", callback_data="settings")])
+def generate_buttons(team_manager: TeamManager, user_id, roles: Tuple[bool, bool], page: int = 0):
+    pages = team_manager.page_count()
+    if pages == 1:
+        return main_keyboard(team_manager.in_main_team(user_id), *roles)
+    return paged_main_keyboard(team_manager.in_main_team(user_id), *roles, min(page, pages - 1), pages)
 
-    if is_super_admin:
-        buttons.append([InlineKeyboardButton("⚙️ Settings", callback_data="settings")])
-        
-    return InlineKeyboardMarkup(buttons)
-
-def generate_settings_buttons(is_super_admin=False):
-    buttons = [
-        [InlineKeyboardButton("📅 Set Date", callback_data="set_date")],
-        [InlineKeyboardButton("📍 Set Venue", callback_data="set_venue")],
-        [InlineKeyboardButton("👥 Set Max Team Size", callback_data="set_max")],
-        [InlineKeyboardButton("🧹 Clear Team Lists", callback_data="clear_team")],
-    ]
-
-    if is_super_admin:
-        buttons.append([InlineKeyboardButton("➕ Add Admin", callback_data="add_admin")])
-        buttons.append([InlineKeyboardButton("📋 List Admins", callback_data="list_admins")])
-
-    buttons.append([InlineKeyboardButton("🔙 Back", callback_data="back_to_main")])
-    return InlineKeyboardMarkup(buttons)
-    
+@metrics.timed("handler", lambda update, context: "command:start")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     user_id = user.id
     username = user.username or ""
     full_name = f"{user.first_name} {user.last_name}".strip() if user.last_name else user.first_name
+    team_manager = await get_team_manager(update)
 
     await update.message.reply_html(
-        get_team_message(),
-        reply_markup=generate_buttons(user_id, username)
+        team_manager.get_team_message(),
+        reply_markup=generate_buttons(team_manager, user_id, get_roles(user_id, username))
     )
 
+@metrics.timed("handler", lambda update, context: "command:setevent")
 async def set_event(update: Update, context: ContextTypes.DEFAULT_TYPE):
     username = update.effective_user.username
 
     # For demo: allow only super admin (or all admins) to set event details
-    if not team_manager.is_admin(username):
+    if not admin_manager.is_admin(username):
         await update.message.reply_text("❌ You don't have permission to set the event.")
         return
 
     # Expect command like: /setevent 20 Stadium 2025-06-01
     args = context.args
     if len(args) < 3:
-        await update.message.reply_text("Usage: /setevent <max_players> <venue> <event_date>\nExample: /setevent 20 Stadium 2025-06-01")
+        await update.message.reply_text("Usage: /setevent <max_players> <venue> <event_date>\nExample: /setevent 20 Stadium 2025-06-01 19:00")
         return
 
     try:
         max_players = int(args[0])
         venue = args[1]
-        event_date = args[2]
+        event_date = " ".join(args[2:])
     except Exception:
         await update.message.reply_text("Invalid arguments. Please check the format.")
         return
 
-    team_manager.set_event_details(max_players, venue, event_date)
+    team_manager = await get_team_manager(update)
+    old_venue = team_manager.venue
+    await team_manager.set_event_details(max_players, venue, event_date)
     await update.message.reply_text(
         f"✅ Event updated:\nMax Players: {max_players}\nVenue: {venue}\nDate: {event_date}"
     )
+    await announce_venue(update, team_manager, old_venue)
+    await schedule_event_jobs(update, team_manager)
+
+@metrics.timed("handler", lambda update, context: "command:importadmins")
+async def import_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/importadmins @a @b c,d — or a CSV sent with that caption, or the command as a reply to a CSV."""
+    user = update.effective_user
+    message = update.message
+    if not admin_manager.is_super_admin(user.id, user.username):
+        await message.reply_text("❌ Only super admins can import admins.")
+        return
+
+    document = message.document or (message.reply_to_message and message.reply_to_message.document)
+    if document:
+        if document.file_size and document.file_size > MAX_IMPORT_BYTES:
+            await message.reply_text(f"❌ File is too large (max {MAX_IMPORT_BYTES // 1024} KB).")
+            return
+        file = await document.get_file()
+        text = (await file.download_as_bytearray()).decode("utf-8-sig", errors="replace")
+    else:
+        text = "\n".join(context.args or [])
+
+    usernames = usernames_from_csv(text)
+    if not usernames:
+        await message.reply_text(
+            "Usage: /importadmins @user1 @user2 ...\nOr send a CSV file (one username per row, "
+            "or a \"username\" column) with /importadmins as the caption."
+        )
+        return
+
+    try:
+        added, skipped, invalid = await admin_manager.import_admins(usernames)
+    except Exception as e:
+        logger.error(f"❌ Failed to import admins: {e}")
+        await message.reply_text("❌ Import failed, nothing was changed. Please try again.")
+        return
+
+    lines = [f"✅ Imported {len(added)} admins."]
+    if skipped:
+        lines.append(f"↩️ Skipped {len(skipped)} (already admins or listed twice).")
+    if invalid:
+        shown = ", ".join(invalid[:10]) + (" ..." if len(invalid) > 10 else "")
+        lines.append(f"⚠️ {len(invalid)} invalid usernames: {shown}")
+    await message.reply_text("\n".join(lines))
+
+@metrics.timed("handler", lambda update, context: "command:exportadmins")
+async def export_admins(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    if not admin_manager.is_super_admin(user.id, user.username):
+        await update.message.reply_text("❌ Only super admins can export admins.")
+        return
+
+    admins = admin_manager.get_admins()
+    if not admins:
+        await update.message.reply_text("❌ No admins found.")
+        return
+    await update.message.reply_document(
+        InputFile(admins_to_csv(admins), filename="admins.csv"),
+        caption=f"📋 {len(admins)} admins",
+    )
 
+@metrics.timed("handler", lambda update, context: "text")
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if "awaiting_input" not in context.user_data:
+    field = await pending_inputs.pop(update.effective_user.id, update.effective_chat.id)
+    if field is None:
         return
 
-    field = context.user_data.pop("awaiting_input")
     value = update.message.text.strip()
+    team_manager = await get_team_manager(update)
+    user_id = update.effective_user.id
+    roles = get_roles(user_id, update.effective_user.username)
 
     if field == "event_date":
-        team_manager.event_date = value
+        await team_manager.set_event_date(value)
         await update.message.reply_text(f"✅ Event date set to: {value}")
+        await schedule_event_jobs(update, team_manager)
     elif field == "venue":
-        team_manager.venue = value
+        old_venue = team_manager.venue
+        await team_manager.set_venue(value)
         await update.message.reply_text(f"✅ Venue set to: {value}")
+        await announce_venue(update, team_manager, old_venue)
     elif field == "max_players":
         try:
             new_max = int(value)
-            current_players = len(team_manager.main_team)
 
-            if new_max < current_players:
+            if not await team_manager.set_max_players(new_max):
+                current_players = team_manager.roster.main_count
                 await update.message.reply_text(
                     f"❌ Max players cannot be less than the current number of players ({current_players})."
                 )
             else:
-                team_manager.max_players = new_max
                 await update.message.reply_text(f"✅ Max players set to: {new_max}")
         except ValueError:
             await update.message.reply_text("❌ Please enter a valid number.")
 
         # Always refresh the team list after processing input
         await update.message.reply_html(
-            get_team_message(),
-            reply_markup=generate_buttons(update.effective_user.id, update.effective_user.username)
+            team_manager.get_team_message(),
+            reply_markup=generate_buttons(team_manager, user_id, roles)
         )
     elif field == "add_admin":
         username = value.strip().lstrip('@')
-        if team_manager.add_admin(username):
+        if await admin_manager.add_admin(username):
             await update.message.reply_text(f"✅ @{username} has been added as an admin.")
         else:
             await update.message.reply_text("❌ Failed to add admin. Make sure the username is valid.")
             
     await update.message.reply_html(
-        get_team_message(),
-        reply_markup=generate_buttons(update.effective_user.id, update.effective_user.username)
+        team_manager.get_team_message(),
+        reply_markup=generate_buttons(team_manager, user_id, roles)
     )
     
+def callback_action(update: Update, context=None) -> str:
+    """Histogram label for a button press: the callback_data without its argument."""
+    return "callback:" + (update.callback_query.data or "").split(":", 1)[0]
+
+@metrics.timed("handler", callback_action)
 async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user = query.from_user
     user_id = user.id
     username = user.username or "anonymous"
-    full_name = f"{user.first_name} {user.last_name}".strip() if user.last_name else user.first_name
+    team_manager = await get_team_manager(update)
+    roles = get_roles(user_id, username)
+    is_admin, is_super_admin = roles
 
     if query.data == "add":
-        response = team_manager.join_team(user_id, full_name, username)
-        buttons = generate_buttons(user_id, username)
-        await query.edit_message_text(get_team_message(), reply_markup=buttons, parse_mode="HTML")
+        full_name = f"{user.first_name} {user.last_name}".strip() if user.last_name else user.first_name
+        response = await team_manager.join_team(user_id, full_name, username)
+        buttons = generate_buttons(team_manager, user_id, roles)
+        await schedule_roster_edit(query, team_manager.get_team_message(), buttons)
         return
 
     elif query.data == "remove":
-        response = team_manager.leave_team(user_id)
-        buttons = generate_buttons(user_id, username)
-        await query.edit_message_text(get_team_message(), reply_markup=buttons, parse_mode="HTML")
+        response = await team_manager.leave_team(user_id)
+        buttons = generate_buttons(team_manager, user_id, roles)
+        await schedule_roster_edit(query, team_manager.get_team_message(), buttons)
         return
 
     elif query.data == "team":
-        await query.edit_message_text(get_team_message(), reply_markup=generate_buttons(user_id, username), parse_mode="HTML")
+        await schedule_roster_edit(query, team_manager.get_team_message(), generate_buttons(team_manager, user_id, roles))
+        return
+
+    elif query.data.startswith("page:"):
+        try:
+            page = int(query.data.split(":", 1)[1])
+        except ValueError:
+            page = 0
+        await schedule_roster_edit(
+            query, team_manager.get_team_message(page), generate_buttons(team_manager, user_id, roles, page)
+        )
         return
 
     elif query.data == "settings":
-        is_super_admin = team_manager.is_super_admin(user_id=user_id, username=username)
-        await query.edit_message_text(
+        await edit_query_message(
+            query,
             "⚙️ <b>Event Settings</b>\nChoose what you want to configure:",
-            reply_markup=generate_settings_buttons(is_super_admin=is_super_admin),
+            reply_markup=settings_keyboard(is_super_admin),
             parse_mode="HTML"
         )
         return
 
     elif query.data == "set_date":
-        await query.edit_message_text("📅 Send me the new event date (e.g., 2025-06-01):", parse_mode="HTML")
-        context.user_data["awaiting_input"] = "event_date"
+        await edit_query_message(query, "📅 Send me the new event date (e.g., 2025-06-01 19:00):", parse_mode="HTML")
+        await pending_inputs.set(user_id, query.message.chat_id, "event_date")
         return
 
     elif query.data == "set_venue":
-        await query.edit_message_text("📍 Send me the new venue name:", parse_mode="HTML")
-        context.user_data["awaiting_input"] = "venue"
+        await edit_query_message(query, "📍 Send me the new venue name:", parse_mode="HTML")
+        await pending_inputs.set(user_id, query.message.chat_id, "venue")
         return
 
     elif query.data == "set_max":
-        await query.edit_message_text("👥 Send the new max number of players (e.g., 18):", parse_mode="HTML")
-        context.user_data["awaiting_input"] = "max_players"
+        await edit_query_message(query, "👥 Send the new max number of players (e.g., 18):", parse_mode="HTML")
+        await pending_inputs.set(user_id, query.message.chat_id, "max_players")
         return
 
     elif query.data == "clear_team":
-        if team_manager.is_admin(username=username) or team_manager.is_super_admin(username=username):
-            team_manager.main_team.clear()
-            team_manager.reserve_team.clear()
-            await query.edit_message_text(
+        if is_admin or is_super_admin:
+            await team_manager.clear_teams()
+            await edit_query_message(
+                query,
                 "🧹 <b>Team lists have been cleared.</b>",
-                reply_markup=generate_settings_buttons(),
+                reply_markup=settings_keyboard(),
                 parse_mode="HTML"
             )
         else:
@@ -266,23 +647,19 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     elif query.data == "add_admin":
-        await query.edit_message_text("👤 Send the @username of the user to add as admin:", parse_mode="HTML")
-        context.user_data["awaiting_input"] = "add_admin"
+        await edit_query_message(query, "👤 Send the @username of the user to add as admin:", parse_mode="HTML")
+        await pending_inputs.set(user_id, query.message.chat_id, "add_admin")
         return
 
     elif query.data == "list_admins":
-        admins = team_manager.get_admins()  # Should return list of (user_id, username)
-        if not admins:
-            await query.edit_message_text("❌ No admins found.", parse_mode="HTML")
+        admin_buttons = admin_list_keyboard.get()
+        if admin_buttons is None:
+            await edit_query_message(query, "❌ No admins found.", parse_mode="HTML")
         else:
-            buttons = [
-                [InlineKeyboardButton(f"🗑 Remove @{uname}", callback_data=f"remove_admin:{uname}")]
-                for uname in admins
-            ]
-            buttons.append([InlineKeyboardButton("🔙 Back", callback_data="settings")])
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 "📋 <b>Admin List</b>",
-                reply_markup=InlineKeyboardMarkup(buttons),
+                reply_markup=admin_buttons,
                 parse_mode="HTML"
             )
         return
@@ -290,41 +667,40 @@ async def handle_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif query.data.startswith("remove_admin:"):
         username_to_remove = query.data.split(":")[1]
     
-        if team_manager.remove_admin(username_to_remove):
+        if await admin_manager.remove_admin(username_to_remove):
             await query.answer(f"✅ Removed @{username_to_remove} from admins.")
         else:
             await query.answer(f"❌ Failed to remove @{username_to_remove}.")
     
     # Refresh the admin list
-        admins = team_manager.get_admins()  # Should return list of (user_id, username)
-        if not admins:
-            await query.edit_message_text("❌ No admins found.", parse_mode="HTML")
+        admin_buttons = admin_list_keyboard.get()
+        if admin_buttons is None:
+            await edit_query_message(query, "❌ No admins found.", parse_mode="HTML")
         else:
-            buttons = [
-                [InlineKeyboardButton(f"🗑 Remove @{uname}", callback_data=f"remove_admin:{uname}")]
-                for uname in admins
-            ]
-            buttons.append([InlineKeyboardButton("🔙 Back", callback_data="settings")])
-            await query.edit_message_text(
+            await edit_query_message(
+                query,
                 "📋 <b>Admin List</b>",
-                reply_markup=InlineKeyboardMarkup(buttons),
+                reply_markup=admin_buttons,
                 parse_mode="HTML"
             )
         return
         
     elif query.data == "back_to_main":
-        await query.edit_message_text(
-            get_team_message(),
-            reply_markup=generate_buttons(user_id, username),
+        await edit_query_message(
+            query,
+            team_manager.get_team_message(),
+            reply_markup=generate_buttons(team_manager, user_id, roles),
             parse_mode="HTML"
         )
         return
 
     # Unknown action fallback
-    await query.edit_message_text("❌ Unknown action.", parse_mode="HTML")
+    await edit_query_message(query, "❌ Unknown action.", parse_mode="HTML")
 
 
 # === Uvicorn entrypoint ===
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("football_bot:app", host="0.0.0.0", port=PORT, reload=False)
+    if WEB_WORKERS > 1 and STATE_BACKEND != "postgres":
+        logger.warning("⚠️ WEB_WORKERS > 1 with the in-memory state backend; set STATE_BACKEND=postgres")
+    uvicorn.run("football_bot:app", host="0.0.0.0", port=PORT, reload=False, workers=WEB_WORKERS)
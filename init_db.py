@@ -15,9 +15,70 @@ cursor = conn.cursor()
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS admin_users (
     id SERIAL PRIMARY KEY,
-    user_id BIGINT UNIQUE NOT NULL,
+    user_id BIGINT UNIQUE,
     full_name TEXT,
-    username TEXT
+    username TEXT UNIQUE
+)
+""")
+# Admins are added by username only (ON CONFLICT (username)); fix up older tables
+cursor.execute("ALTER TABLE admin_users ALTER COLUMN user_id DROP NOT NULL")
+cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS admin_users_username_key ON admin_users (username)")
+
+# Single-row version counter, bumped by every admin write (see admin_manager.py)
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS admin_users_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0
+)
+""")
+cursor.execute("INSERT INTO admin_users_version (id, version) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING")
+
+# Create event settings and roster tables
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS events (
+    event_id TEXT PRIMARY KEY,
+    max_players INTEGER NOT NULL DEFAULT 20,
+    venue TEXT NOT NULL DEFAULT 'Not Set',
+    event_date TEXT NOT NULL DEFAULT 'Not Set',
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+""")
+# Bumped by every change made through the Postgres state backend
+cursor.execute("ALTER TABLE events ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0")
+
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS roster_entries (
+    event_id TEXT NOT NULL REFERENCES events (event_id) ON DELETE CASCADE,
+    user_id BIGINT NOT NULL,
+    full_name TEXT,
+    username TEXT,
+    slot TEXT NOT NULL CHECK (slot IN ('main', 'reserve')),
+    position BIGSERIAL,
+    joined_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (event_id, user_id)
+)
+""")
+cursor.execute("ALTER TABLE roster_entries ADD COLUMN IF NOT EXISTS joined_at TIMESTAMPTZ NOT NULL DEFAULT now()")
+
+# Settings-flow prompts awaiting a reply (see pending_input.py); field is an index into FIELDS
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS pending_inputs (
+    user_id BIGINT PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    field SMALLINT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+)
+""")
+
+# Reminders, signup locks and roster resets waiting to run (see scheduler.py)
+cursor.execute("""
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    event_id TEXT NOT NULL,
+    chat_id BIGINT NOT NULL,
+    kind TEXT NOT NULL,
+    due_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (event_id, kind)
 )
 """)
 
@@ -25,4 +86,4 @@ conn.commit()
 cursor.close()
 conn.close()
 
-print("✅ Table admin_users created successfully.")
+print("✅ Tables admin_users, admin_users_version, events, roster_entries, pending_inputs and scheduled_jobs created successfully.")
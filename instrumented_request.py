@@ -0,0 +1,27 @@
+from typing import Optional
+
+from telegram.request import BaseRequest, HTTPXRequest
+
+from metrics import metrics
+
+
+class InstrumentedRequest(BaseRequest):
+    """Wraps a Bot API transport and records per-method call latency."""
+
+    def __init__(self, wrapped: Optional[BaseRequest] = None):
+        self.wrapped = wrapped or HTTPXRequest()
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return self.wrapped.read_timeout
+
+    async def initialize(self):
+        await self.wrapped.initialize()
+
+    async def shutdown(self):
+        await self.wrapped.shutdown()
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        # The Bot API method name is the last path segment, e.g. ".../editMessageText".
+        with metrics.timer("telegram", url.rsplit("/", 1)[-1]):
+            return await self.wrapped.do_request(url, method, request_data, **kwargs)
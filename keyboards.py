@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from admin_manager import AdminManager
+
+# Telegram objects are immutable once built, so every distinct keyboard is built
+# once and the same markup instance is reused for every message.
+
+@lru_cache(maxsize=None)
+def main_keyboard(in_main_team: bool, is_admin: bool = False, is_super_admin: bool = False) -> InlineKeyboardMarkup:
+    buttons = []
+
+    if in_main_team:
+        buttons.append([InlineKeyboardButton("➖ Remove Me", callback_data="remove")])
+    else:
+        buttons.append([InlineKeyboardButton("➕ Add Me", callback_data="add")])
+
+    buttons.append([InlineKeyboardButton("👥 Show Team", callback_data="team")])
+
+    if is_admin:
+        buttons.append([InlineKeyboardButton("⚙️ Settings", callback_data="settings")])
+
+    if is_super_admin:
+        buttons.append([InlineKeyboardButton("⚙️ Settings", callback_data="settings")])
+
+    return InlineKeyboardMarkup(buttons)
+
+@lru_cache(maxsize=4096)
+def paged_main_keyboard(
+    in_main_team: bool, is_admin: bool, is_super_admin: bool, page: int, pages: int
+) -> InlineKeyboardMarkup:
+    """main_keyboard plus a prev/next row for multi-page rosters."""
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"page:{page - 1}"))
+    nav.append(InlineKeyboardButton(f"📄 {page + 1}/{pages}", callback_data=f"page:{page}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"page:{page + 1}"))
+    rows = main_keyboard(in_main_team, is_admin, is_super_admin).inline_keyboard
+    return InlineKeyboardMarkup((*rows, tuple(nav)))
+
+@lru_cache(maxsize=None)
+def settings_keyboard(is_super_admin: bool = False) -> InlineKeyboardMarkup:
+    buttons = [
+        [InlineKeyboardButton("📅 Set Date", callback_data="set_date")],
+        [InlineKeyboardButton("📍 Set Venue", callback_data="set_venue")],
+        [InlineKeyboardButton("👥 Set Max Team Size", callback_data="set_max")],
+        [InlineKeyboardButton("🧹 Clear Team Lists", callback_data="clear_team")],
+    ]
+
+    if is_super_admin:
+        buttons.append([InlineKeyboardButton("➕ Add Admin", callback_data="add_admin")])
+        buttons.append([InlineKeyboardButton("📋 List Admins", callback_data="list_admins")])
+
+    buttons.append([InlineKeyboardButton("🔙 Back", callback_data="back_to_main")])
+    return InlineKeyboardMarkup(buttons)
+
+
+class AdminListKeyboard:
+    """The "remove admin" keyboard, rebuilt only when the admin set changes."""
+
+    def __init__(self, admin_manager: AdminManager):
+        self.admin_manager = admin_manager
+        self._cached: Tuple[int, Optional[InlineKeyboardMarkup]] = (-1, None)
+
+    def get(self) -> Optional[InlineKeyboardMarkup]:
+        """Returns the markup, or None when there are no admins to list."""
+        version, markup = self._cached
+        if version != self.admin_manager.version:
+            markup = self._build()
+            self._cached = (self.admin_manager.version, markup)
+        return markup
+
+    def _build(self) -> Optional[InlineKeyboardMarkup]:
+        admins = self.admin_manager.get_admins()
+        if not admins:
+            return None
+        buttons = [
+            [InlineKeyboardButton(f"🗑 Remove @{uname}", callback_data=f"remove_admin:{uname}")]
+            for uname in admins
+        ]
+        buttons.append([InlineKeyboardButton("🔙 Back", callback_data="settings")])
+        return InlineKeyboardMarkup(buttons)
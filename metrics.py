@@ -0,0 +1,113 @@
+import time
+import logging
+import functools
+from bisect import bisect_left
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Bucket upper bounds in milliseconds; the last bucket catches everything slower.
+BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are estimated from bucket bounds."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                **{f"le_{bound:g}": n for bound, n in zip(BUCKETS_MS, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class Metrics:
+    """Latency histograms grouped by family (handler, db, telegram) and label."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+
+    def observe(self, family: str, label: str, seconds: float):
+        histograms = self._histograms.setdefault(family, {})
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, family: str, label: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(family, label, time.perf_counter() - started)
+
+    def timed(self, family: str, label: Callable[..., str]):
+        """Decorator timing a coroutine function under ``label(*args, **kwargs)``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with self.timer(family, label(*args, **kwargs)):
+                    return await fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            family: {label: histogram.snapshot() for label, histogram in sorted(histograms.items())}
+            for family, histograms in self._histograms.items()
+        }
+
+
+metrics = Metrics()
+
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """Routes all log records through a queue so emitting never blocks on the output stream.
+
+    Returns the started listener; call ``stop()`` on shutdown to flush it.
+    """
+    log_queue: SimpleQueue = SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
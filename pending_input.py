@@ -0,0 +1,138 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from telegram import Message
+from telegram.ext.filters import MessageFilter
+
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+# Values the settings flows can wait for; entries store the index, not the name.
+FIELDS = ("event_date", "venue", "max_players", "add_admin")
+FIELD_INDEX = {field: index for index, field in enumerate(FIELDS)}
+
+# Expired rows are swept whenever a new prompt is saved.
+SAVE_SQL = """
+    WITH expired AS (DELETE FROM pending_inputs WHERE expires_at <= now())
+    INSERT INTO pending_inputs (user_id, chat_id, field, expires_at)
+    VALUES (%s, %s, %s, to_timestamp(%s))
+    ON CONFLICT (user_id) DO UPDATE
+    SET chat_id = EXCLUDED.chat_id, field = EXCLUDED.field, expires_at = EXCLUDED.expires_at
+"""
+# Deleting the row claims the answer, so only one worker handles it.
+CLAIM_SQL = """
+    DELETE FROM pending_inputs
+    WHERE user_id = %s AND chat_id = %s AND expires_at > now()
+    RETURNING field
+"""
+
+
+class PendingInput:
+    __slots__ = ("chat_id", "field", "expires_at")
+
+    def __init__(self, chat_id: int, field: int, expires_at: float):
+        self.chat_id = chat_id
+        self.field = field
+        self.expires_at = expires_at
+
+
+class PendingInputStore:
+    """What each user was asked to type next (a date, a venue, ...), keyed by user_id.
+
+    Entries expire after ``ttl`` seconds and at most ``max_entries`` are kept.
+    Since every entry gets the same TTL, insertion order is expiry order and
+    expired entries are dropped from the front of the OrderedDict.
+
+    With a ``db``, the ``pending_inputs`` table is the store instead: any
+    worker may receive the answer to a prompt another worker sent, and a
+    restart doesn't lose a half-finished settings flow. ``pop`` then claims the
+    row in the database, and AwaitingInputFilter can no longer pre-filter.
+    """
+
+    def __init__(self, db: Optional[Database] = None, ttl: float = 600, max_entries: int = 10000):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, PendingInput]" = OrderedDict()
+
+        # Metrics
+        self.evicted = 0
+        self.answered = 0
+        self.lookups = 0
+
+    def waiting(self, user_id: int, chat_id: int) -> bool:
+        """True if the user was asked for input in this chat and it hasn't expired."""
+        entry = self._entries.get(user_id)
+        return entry is not None and entry.chat_id == chat_id and entry.expires_at > time.time()
+
+    async def set(self, user_id: int, chat_id: int, field: str):
+        entry = PendingInput(chat_id, FIELD_INDEX[field], time.time() + self.ttl)
+        if self.db:
+            await self.db.execute(SAVE_SQL, (user_id, chat_id, entry.field, entry.expires_at))
+            return
+        self._entries.pop(user_id, None)
+        self._entries[user_id] = entry
+        self._expire()
+
+    async def pop(self, user_id: int, chat_id: int) -> Optional[str]:
+        """Returns and forgets the field the user was asked for, if still pending in this chat."""
+        if self.db:
+            self.lookups += 1
+            try:
+                rows = await self.db.fetchall(CLAIM_SQL, (user_id, chat_id))
+            except Exception as e:
+                logger.error(f"❌ Failed to look up pending input of {user_id}: {e}")
+                return None
+            if not rows:
+                return None
+            self.answered += 1
+            return FIELDS[rows[0][0]]
+
+        self._expire()
+        if not self.waiting(user_id, chat_id):
+            return None
+        entry = self._entries.pop(user_id)
+        self.answered += 1
+        return FIELDS[entry.field]
+
+    def _expire(self):
+        now = time.time()
+        while self._entries:
+            user_id, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[user_id]
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._entries),
+            "answered": self.answered,
+            "evicted": self.evicted,
+            "lookups": self.lookups,
+        }
+
+
+class AwaitingInputFilter(MessageFilter):
+    """Lets a message through only if its sender has pending input in that chat.
+
+    Everything else (regular chat chatter) is dropped with one dict lookup,
+    before any handler code runs. With a database-backed store the prompt may
+    have been sent by another worker, and filters can't await, so every
+    message from a user passes and the handler's ``pop`` does the lookup.
+    """
+
+    def __init__(self, store: PendingInputStore):
+        super().__init__(name="AwaitingInputFilter")
+        self.store = store
+
+    def filter(self, message: Message) -> bool:
+        if message.from_user is None:
+            return False
+        return self.store.db is not None or self.store.waiting(message.from_user.id, message.chat.id)
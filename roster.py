@@ -0,0 +1,164 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+MAIN = "main"
+RESERVE = "reserve"
+
+
+class IdentityCache:
+    """One canonical (full_name, username) pair per user, shared by every roster they're on.
+
+    Names arrive as fresh strings with every update and every database load;
+    interning them here means a user on many events is stored once, and the
+    copies made for each tap are dropped right away. At most ``max_users``
+    users are kept, dropping the ones whose names were stored first; forgetting
+    a user only costs sharing. A plain dict rather than an LRU OrderedDict, as
+    the cache itself is paid for per user.
+    """
+
+    def __init__(self, max_users: int = 100000):
+        self.max_users = max_users
+        self._names: Dict[int, Tuple[str, str]] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, user_id: int, full_name: str, username: str) -> Tuple[str, str]:
+        names = self._names.get(user_id)
+        if names is not None and names[0] == full_name and names[1] == username:
+            self.hits += 1
+            return names
+        self.misses += 1
+        self._names.pop(user_id, None)
+        names = self._names[user_id] = (full_name, username)
+        if len(self._names) > self.max_users:
+            del self._names[next(iter(self._names))]
+        return names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"users": len(self._names), "hits": self.hits, "misses": self.misses}
+
+
+identities = IdentityCache()
+
+
+class Player:
+    """One roster entry: who joined and when (``joined_at``, epoch seconds)."""
+
+    __slots__ = ("user_id", "full_name", "username", "joined_at")
+
+    def __init__(self, user_id: int, full_name: str, username: str, joined_at: Optional[float] = None):
+        self.user_id = user_id
+        self.full_name, self.username = identities.intern(user_id, full_name, username)
+        # Microseconds, like timestamptz, so the stored copy of a new entry compares equal to it.
+        self.joined_at = round(time.time(), 6) if joined_at is None else joined_at
+
+    def _key(self) -> Tuple[int, str, str, float]:
+        return self.user_id, self.full_name, self.username, self.joined_at
+
+    # Equal by value, so a roster reloaded from the database matches the cached page lines.
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Player) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"Player({self.user_id}, {self.full_name!r}, {self.username!r}, {self.joined_at})"
+
+
+class Roster:
+    """Main team and reserve queue with O(1) membership, join, leave and promotion.
+
+    The main team is an insertion-ordered dict keyed by user_id. The reserve is a
+    deque consumed from the left for promotions, paired with a dict of live
+    entries; leaving the reserve only drops the dict entry and the stale deque
+    slot is skipped (and periodically compacted) later.
+    """
+
+    def __init__(self):
+        self._main: Dict[int, Player] = {}
+        self._reserve: Dict[int, Player] = {}
+        self._reserve_queue: Deque[Player] = deque()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._main or user_id in self._reserve
+
+    @property
+    def main_count(self) -> int:
+        return len(self._main)
+
+    @property
+    def reserve_count(self) -> int:
+        return len(self._reserve)
+
+    def slot_of(self, user_id: int) -> Optional[str]:
+        if user_id in self._main:
+            return MAIN
+        if user_id in self._reserve:
+            return RESERVE
+        return None
+
+    def is_main(self, user_id: int) -> bool:
+        return user_id in self._main
+
+    def main_entries(self) -> Iterator[Player]:
+        return iter(self._main.values())
+
+    def reserve_entries(self) -> Iterator[Player]:
+        for entry in self._reserve_queue:
+            if self._reserve.get(entry.user_id) is entry:
+                yield entry
+
+    def join(self, entry: Player, max_players: int) -> Optional[str]:
+        """Adds the entry and returns the slot it landed in, or None if already present."""
+        user_id = entry.user_id
+        if user_id in self:
+            return None
+        if len(self._main) < max_players:
+            self._main[user_id] = entry
+            return MAIN
+        self._reserve[user_id] = entry
+        self._reserve_queue.append(entry)
+        return RESERVE
+
+    def leave(self, user_id: int) -> Tuple[Optional[str], Optional[Player]]:
+        """Removes the user and returns (slot they left, reserve entry promoted in their place)."""
+        if self._main.pop(user_id, None) is not None:
+            return MAIN, self._promote()
+        if self._reserve.pop(user_id, None) is not None:
+            self._compact()
+            return RESERVE, None
+        return None, None
+
+    def clear(self):
+        self._main.clear()
+        self._reserve.clear()
+        self._reserve_queue.clear()
+
+    def load(self, main_team: Iterable[Player], reserve_team: Iterable[Player]):
+        self.clear()
+        for entry in main_team:
+            self._main[entry.user_id] = entry
+        for entry in reserve_team:
+            self._reserve[entry.user_id] = entry
+            self._reserve_queue.append(entry)
+
+    def _promote(self) -> Optional[Player]:
+        while self._reserve_queue:
+            entry = self._reserve_queue.popleft()
+            if self._reserve.get(entry.user_id) is entry:
+                del self._reserve[entry.user_id]
+                self._main[entry.user_id] = entry
+                return entry
+        return None
+
+    def _compact(self):
+        # Keep stale reserve slots bounded so the queue can't grow past ~2x the live size.
+        if len(self._reserve_queue) > 2 * len(self._reserve) + 32:
+            self._reserve_queue = deque(self.reserve_entries())
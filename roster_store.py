@@ -0,0 +1,232 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+
+from db import Database, Statement
+from roster import Player
+
+logger = logging.getLogger(__name__)
+
+ENSURE_EVENT_SQL = "INSERT INTO events (event_id) VALUES (%s) ON CONFLICT (event_id) DO NOTHING"
+
+JOIN_SQL = """
+    INSERT INTO roster_entries (event_id, user_id, full_name, username, slot, joined_at)
+    VALUES (%s, %s, %s, %s, %s, to_timestamp(%s))
+    ON CONFLICT (event_id, user_id) DO UPDATE
+    SET full_name = EXCLUDED.full_name, username = EXCLUDED.username,
+        slot = EXCLUDED.slot, position = DEFAULT, joined_at = EXCLUDED.joined_at
+"""
+
+LEAVE_SQL = "DELETE FROM roster_entries WHERE event_id = %s AND user_id = %s"
+
+# Promoted players go to the back of the main list, so they get a fresh position.
+PROMOTE_SQL = """
+    UPDATE roster_entries SET slot = 'main', position = DEFAULT
+    WHERE event_id = %s AND user_id = %s
+"""
+
+CLEAR_SQL = "DELETE FROM roster_entries WHERE event_id = %s"
+
+SETTINGS_SQL = """
+    INSERT INTO events (event_id, max_players, venue, event_date, updated_at)
+    VALUES (%s, %s, %s, %s, now())
+    ON CONFLICT (event_id) DO UPDATE
+    SET max_players = EXCLUDED.max_players, venue = EXCLUDED.venue,
+        event_date = EXCLUDED.event_date, updated_at = now()
+"""
+
+LOAD_EVENT_SQL = """
+    SELECT e.max_players, e.venue, e.event_date, e.version,
+           r.user_id, r.full_name, r.username, r.slot, extract(epoch FROM r.joined_at)::float8
+    FROM events e
+    LEFT JOIN roster_entries r ON r.event_id = e.event_id
+    WHERE e.event_id = %s
+    ORDER BY r.position
+"""
+
+
+class EventSnapshot:
+    """Persisted state of one event as returned by the load query."""
+
+    def __init__(self, max_players: int, venue: str, event_date: str, version: int = 0):
+        self.max_players = max_players
+        self.venue = venue
+        self.event_date = event_date
+        self.version = version
+        self.main_team: List[Player] = []
+        self.reserve_team: List[Player] = []
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> Optional["EventSnapshot"]:
+        """Builds a snapshot from LOAD_EVENT_SQL rows, or None if the event was never saved."""
+        if not rows:
+            return None
+        snapshot = cls(*rows[0][:4])
+        for *_, user_id, full_name, username, slot, joined_at in rows:
+            if user_id is None:
+                continue
+            entry = Player(user_id, full_name, username, joined_at)
+            if slot == "main":
+                snapshot.main_team.append(entry)
+            else:
+                snapshot.reserve_team.append(entry)
+        return snapshot
+
+
+class RosterStore:
+    """Write-behind persistence for rosters and event settings.
+
+    Mutations are queued in memory and flushed every ``flush_interval`` seconds,
+    all pending operations in one transaction, so button taps never wait on the
+    database. A batch that fails ``max_retries`` times in a row is written one
+    statement at a time instead, and statements the database rejects on their
+    own are dropped, so one bad row can't stall every later write. While the
+    database is unreachable, at most ``max_pending`` operations are kept; the
+    oldest are dropped beyond that.
+    """
+
+    def __init__(self, db: Database, flush_interval: float = 0.5, max_retries: int = 3, max_pending: int = 100000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self._pending: List[Tuple[str, Statement]] = []
+        self._failures = 0  # consecutive failed flushes
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.flushes = 0
+        self.flushed_ops = 0
+        self.failed_flushes = 0
+        self.dropped_ops = 0
+
+    # === Lifecycle ===
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stops the background flusher and writes out anything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    # === Recording mutations ===
+    def _enqueue(self, event_id: str, sql: str, params: tuple):
+        self._pending.append((event_id, (sql, params)))
+        self._trim()
+        self._wakeup.set()
+
+    def _requeue(self, batch: List[Tuple[str, Statement]]):
+        # In front of anything queued meanwhile, and retried next interval.
+        self._pending[:0] = batch
+        self._trim()
+        self._wakeup.set()
+
+    def _trim(self):
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped_ops += overflow
+
+    def record_join(self, event_id: str, entry: Player, slot: str):
+        self._enqueue(
+            event_id, JOIN_SQL, (event_id, entry.user_id, entry.full_name, entry.username, slot, entry.joined_at)
+        )
+
+    def record_leave(self, event_id: str, user_id: int):
+        self._enqueue(event_id, LEAVE_SQL, (event_id, user_id))
+
+    def record_promote(self, event_id: str, user_id: int):
+        self._enqueue(event_id, PROMOTE_SQL, (event_id, user_id))
+
+    def record_clear(self, event_id: str):
+        self._enqueue(event_id, CLEAR_SQL, (event_id,))
+
+    def record_settings(self, event_id: str, max_players: int, venue: str, event_date: str):
+        self._enqueue(event_id, SETTINGS_SQL, (event_id, max_players, venue, event_date))
+
+    # === Flushing ===
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            if self._failures >= self.max_retries:
+                await self._flush_singly(batch)
+                return
+
+            # Roster rows reference their event, so make sure every touched event exists first.
+            event_ids = dict.fromkeys(event_id for event_id, _ in batch)
+            statements = [(ENSURE_EVENT_SQL, (event_id,)) for event_id in event_ids]
+            statements.extend(statement for _, statement in batch)
+
+            try:
+                await self.db.execute_many(statements)
+            except Exception as e:
+                self._requeue(batch)
+                self._failures += 1
+                self.failed_flushes += 1
+                logger.error(f"❌ Failed to flush {len(batch)} roster changes: {e}")
+                return
+
+            self._failures = 0
+            self.flushes += 1
+            self.flushed_ops += len(batch)
+
+    async def _flush_singly(self, batch: List[Tuple[str, Statement]]):
+        """Writes a batch that kept failing one statement at a time, dropping the ones at fault."""
+        for index, (event_id, statement) in enumerate(batch):
+            try:
+                await self.db.execute_many([(ENSURE_EVENT_SQL, (event_id,)), statement])
+            except (psycopg2.OperationalError, psycopg2.InterfaceError, OSError) as e:
+                # The database itself is unreachable, not this statement: keep the rest and
+                # go back to whole batches once it answers again.
+                self._requeue(batch[index:])
+                self._failures = 0
+                self.failed_flushes += 1
+                logger.error(f"❌ Failed to flush {len(batch) - index} roster changes: {e}")
+                return
+            except Exception as e:
+                self.dropped_ops += 1
+                logger.error(f"❌ Dropped a roster change for {event_id} the database rejects: {e}")
+            else:
+                self.flushed_ops += 1
+        self._failures = 0
+        self.flushes += 1
+
+    # === Loading ===
+    async def load_event(self, event_id: str) -> Optional[EventSnapshot]:
+        """Loads one event with its roster in a single query, or None if it was never saved."""
+        # Writes for this event may still be queued or in flight (e.g. it was evicted and is
+        # being reloaded), so let them land before reading.
+        if self._flush_lock.locked() or any(pending_id == event_id for pending_id, _ in self._pending):
+            await self.flush()
+
+        return EventSnapshot.from_rows(await self.db.fetchall(LOAD_EVENT_SQL, (event_id,)))
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+            "failed_flushes": self.failed_flushes,
+            "dropped_ops": self.dropped_ops,
+        }
@@ -0,0 +1,309 @@
+import time
+import heapq
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from db import Database
+
+logger = logging.getLogger(__name__)
+
+# Accepted spellings of event_date; a missing time means default_time.
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%d.%m.%Y %H:%M", "%d/%m/%Y %H:%M",
+    "%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y",
+)
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([dhm])")
+DURATION_UNITS = {"d": 86400, "h": 3600, "m": 60}
+
+REMIND = "remind"
+LOCK = "lock"
+RESET = "reset"
+
+LOAD_JOBS_SQL = "SELECT event_id, chat_id, kind, extract(epoch FROM due_at) FROM scheduled_jobs"
+DELETE_EVENT_JOBS_SQL = "DELETE FROM scheduled_jobs WHERE event_id = %s"
+INSERT_JOBS_SQL = "INSERT INTO scheduled_jobs (event_id, chat_id, kind, due_at) VALUES %s"
+INSERT_JOB_TEMPLATE = "(%s, %s, %s, to_timestamp(%s))"
+# Deleting the row claims the job, so with several workers only one of them fires it.
+CLAIM_JOB_SQL = """
+    DELETE FROM scheduled_jobs
+    WHERE event_id = %s AND kind = %s AND due_at = to_timestamp(%s)
+    RETURNING 1
+"""
+
+
+def parse_duration(text: str) -> Optional[timedelta]:
+    """"90m", "2h", "1d 6h" -> timedelta; "" or "off" -> None."""
+    text = text.strip().lower()
+    if not text or text == "off":
+        return None
+    parts = DURATION_RE.findall(text)
+    if not parts:
+        raise ValueError(f"invalid duration: {text!r}")
+    return timedelta(seconds=sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts))
+
+
+class EventSchedule:
+    """When reminders, the signup lock and the roster reset happen relative to an event.
+
+    Offsets are counted back (reminders, lock) or forward (reset) from the event
+    time parsed out of event_date. Signups are locked from ``lock_before`` ahead
+    of the event until the reset.
+    """
+
+    def __init__(
+        self,
+        tz: tzinfo = timezone.utc,
+        default_time: str = "18:00",
+        reminders: Tuple[timedelta, ...] = (timedelta(hours=24), timedelta(hours=2)),
+        lock_before: Optional[timedelta] = timedelta(hours=1),
+        reset_after: Optional[timedelta] = timedelta(hours=3),
+    ):
+        self.tz = tz
+        self.default_time = datetime.strptime(default_time, "%H:%M").time()
+        self.reminders = tuple(sorted(reminders, reverse=True))
+        self.lock_before = lock_before
+        self.reset_after = reset_after
+
+    def parse(self, event_date: str) -> Optional[datetime]:
+        """Parses event_date into an aware datetime, or None if it isn't a date we understand."""
+        text = " ".join(event_date.split())
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if "%H" not in fmt:
+                parsed = datetime.combine(parsed.date(), self.default_time)
+            return parsed.replace(tzinfo=self.tz)
+        return None
+
+    def jobs_for(self, event_time: Optional[datetime]) -> List[Tuple[str, float]]:
+        """(kind, due timestamp) for every job of an event at ``event_time``."""
+        if event_time is None:
+            return []
+        jobs = [(f"{REMIND}:{int(offset.total_seconds())}", event_time - offset) for offset in self.reminders]
+        if self.lock_before is not None:
+            jobs.append((LOCK, event_time - self.lock_before))
+        if self.reset_after is not None:
+            jobs.append((RESET, event_time + self.reset_after))
+        return [(kind, due.timestamp()) for kind, due in jobs]
+
+    def signups_locked(self, event_time: Optional[datetime], now: Optional[datetime] = None) -> bool:
+        if event_time is None or self.lock_before is None:
+            return False
+        now = now or datetime.now(timezone.utc)
+        if now < event_time - self.lock_before:
+            return False
+        return self.reset_after is None or now < event_time + self.reset_after
+
+
+class Job:
+    __slots__ = ("event_id", "chat_id", "kind", "due", "seq")
+
+    def __init__(self, event_id: str, chat_id: int, kind: str, due: float, seq: int):
+        self.event_id = event_id
+        self.chat_id = chat_id
+        self.kind = kind
+        self.due = due
+        self.seq = seq
+
+
+JobKey = Tuple[str, str]  # (event_id, kind)
+
+
+class JobScheduler:
+    """Timer heap of per-event jobs, run by one asyncio task.
+
+    The task sleeps until the earliest due time (or until an earlier job is
+    added), so scheduling costs O(log n) and nothing scans all events.
+    Replaced or cancelled jobs leave stale heap entries that are skipped when
+    popped and compacted away when they pile up. With a ``db``, jobs are kept
+    in ``scheduled_jobs`` and reloaded on start, retrying with backoff until
+    the database answers; a job is only run by the process that manages to
+    delete its row.
+    """
+
+    def __init__(
+        self,
+        on_due: Callable[[Job], Awaitable[None]],
+        db: Optional[Database] = None,
+        misfire_grace: float = 3600,
+        load_retry_delay: float = 1.0,
+    ):
+        self.on_due = on_due
+        self.db = db
+        self.misfire_grace = misfire_grace
+        self.load_retry_delay = load_retry_delay
+
+        self._heap: List[Tuple[float, int, JobKey]] = []
+        self._jobs: Dict[JobKey, Job] = {}
+        self._event_kinds: Dict[str, Set[str]] = {}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loader: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self.loaded = False
+
+        # Metrics
+        self.fired = 0
+        self.missed = 0
+        self.claimed_elsewhere = 0
+        self.failed = 0
+        self.load_failures = 0
+
+    # === Lifecycle ===
+    async def start(self):
+        """Starts the timer task and reloads persisted jobs in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if self._loader is None and not self.loaded:
+            self._loader = asyncio.create_task(self._load_until_done())
+
+    async def stop(self):
+        for task in (self._loader, self._task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._loader = self._task = None
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _load_until_done(self):
+        # The database is often still waking up when the bot starts; the timer keeps
+        # running meanwhile, so jobs scheduled in the meantime aren't held up.
+        delay = self.load_retry_delay
+        while True:
+            try:
+                await self._load()
+                break
+            except Exception as e:
+                self.load_failures += 1
+                logger.error(f"❌ Failed to load scheduled jobs, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+        self.loaded = True
+        self._loader = None
+
+    async def _load(self):
+        if not self.db:
+            return
+        rows = await self.db.fetchall(LOAD_JOBS_SQL)
+        restored = 0
+        for event_id, chat_id, kind, due in rows:
+            # A job scheduled by this process since the start is newer than the stored one.
+            if (event_id, kind) not in self._jobs:
+                self._push(event_id, chat_id, kind, float(due))
+                restored += 1
+        logger.info(f"⏰ Restored {restored} scheduled jobs")
+
+    # === Scheduling ===
+    async def replace_event_jobs(self, event_id: str, chat_id: int, jobs: List[Tuple[str, float]]):
+        """Replaces all jobs of an event; jobs already in the past are dropped."""
+        now = time.time()
+        jobs = [(kind, due) for kind, due in jobs if due > now]
+        for kind in self._event_kinds.pop(event_id, ()):
+            self._jobs.pop((event_id, kind), None)
+        for kind, due in jobs:
+            self._push(event_id, chat_id, kind, due)
+
+        if self.db:
+            def replace(cursor):
+                cursor.execute(DELETE_EVENT_JOBS_SQL, (event_id,))
+                if jobs:
+                    execute_values(
+                        cursor, INSERT_JOBS_SQL, [(event_id, chat_id, kind, due) for kind, due in jobs],
+                        template=INSERT_JOB_TEMPLATE,
+                    )
+            try:
+                await self.db.run(replace, label="schedule_jobs")
+            except Exception as e:
+                logger.error(f"❌ Failed to persist jobs for {event_id}: {e}")
+
+    def _push(self, event_id: str, chat_id: int, kind: str, due: float):
+        self._seq += 1
+        key = (event_id, kind)
+        self._jobs[key] = Job(event_id, chat_id, kind, due, self._seq)
+        self._event_kinds.setdefault(event_id, set()).add(kind)
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()  # the timer is idle or sleeping until a later job
+        heapq.heappush(self._heap, (due, self._seq, key))
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [(job.due, job.seq, key) for key, job in self._jobs.items()]
+            heapq.heapify(self._heap)
+
+    # === Running ===
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            while self._heap:
+                due, seq, key = self._heap[0]
+                job = self._jobs.get(key)
+                if job is None or job.seq != seq:
+                    heapq.heappop(self._heap)  # replaced or cancelled
+                    continue
+                delay = due - time.time()
+                if delay > 0:
+                    # Re-check now and then, in case the wall clock jumped.
+                    timeout = min(delay, 300)
+                    break
+                heapq.heappop(self._heap)
+                self._pop(job)
+                task = asyncio.create_task(self._fire(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _pop(self, job: Job):
+        del self._jobs[(job.event_id, job.kind)]
+        kinds = self._event_kinds.get(job.event_id)
+        if kinds is not None:
+            kinds.discard(job.kind)
+            if not kinds:
+                del self._event_kinds[job.event_id]
+
+    async def _fire(self, job: Job):
+        late = time.time() - job.due
+        try:
+            if self.db and not await self._claim(job):
+                self.claimed_elsewhere += 1
+                return
+            if job.kind.startswith(REMIND) and late > self.misfire_grace:
+                # A reminder hours after the fact (e.g. after downtime) is just noise.
+                self.missed += 1
+                logger.info(f"⏰ Skipped late {job.kind} for {job.event_id} ({late:.0f}s late)")
+                return
+            await self.on_due(job)
+            self.fired += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Job {job.kind} for {job.event_id} failed: {e}")
+
+    async def _claim(self, job: Job) -> bool:
+        def claim(cursor):
+            cursor.execute(CLAIM_JOB_SQL, (job.event_id, job.kind, job.due))
+            return cursor.fetchone() is not None
+        return await self.db.run(claim, label="claim_job")
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        next_due = min((job.due for job in self._jobs.values()), default=None)
+        return {
+            "jobs": len(self._jobs),
+            "heap": len(self._heap),
+            "next_due_in_s": round(next_due - time.time(), 1) if next_due is not None else None,
+            "fired": self.fired,
+            "missed": self.missed,
+            "claimed_elsewhere": self.claimed_elsewhere,
+            "failed": self.failed,
+            "loaded": self.loaded,
+            "load_failures": self.load_failures,
+        }
@@ -0,0 +1,350 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
+
+from db import Database
+from roster import MAIN, Player
+from roster_store import ENSURE_EVENT_SQL, LOAD_EVENT_SQL, EventSnapshot, RosterStore
+
+if TYPE_CHECKING:
+    from team_manager import TeamManager
+
+# Every mutation first takes the event row lock, so join/leave/promote of one
+# event are serialized across all workers and replicas, like TeamManager.lock
+# serializes them within a process.
+LOCK_EVENT_SQL = ENSURE_EVENT_SQL + ";\n" + "SELECT version FROM events WHERE event_id = %s FOR UPDATE"
+
+# Lands in main while there's room, otherwise in reserve; no row if already listed.
+JOIN_ATOMIC_SQL = """
+    INSERT INTO roster_entries (event_id, user_id, full_name, username, slot, joined_at)
+    SELECT e.event_id, %(user_id)s, %(full_name)s, %(username)s,
+           CASE WHEN (SELECT count(*) FROM roster_entries r
+                      WHERE r.event_id = e.event_id AND r.slot = 'main') < e.max_players
+                THEN 'main' ELSE 'reserve' END,
+           to_timestamp(%(joined_at)s)
+    FROM events e
+    WHERE e.event_id = %(event_id)s
+    ON CONFLICT (event_id, user_id) DO NOTHING
+    RETURNING slot
+"""
+
+LEAVE_ATOMIC_SQL = "DELETE FROM roster_entries WHERE event_id = %s AND user_id = %s RETURNING slot"
+
+PROMOTE_NEXT_SQL = """
+    UPDATE roster_entries SET slot = 'main', position = DEFAULT
+    WHERE event_id = %s AND user_id = (
+        SELECT user_id FROM roster_entries
+        WHERE event_id = %s AND slot = 'reserve'
+        ORDER BY position
+        LIMIT 1
+    )
+    RETURNING user_id, full_name, username, extract(epoch FROM joined_at)::float8
+"""
+
+CLEAR_ATOMIC_SQL = "DELETE FROM roster_entries WHERE event_id = %s"
+
+MAIN_COUNT_SQL = "SELECT count(*) FROM roster_entries WHERE event_id = %s AND slot = 'main'"
+
+UPDATE_SETTINGS_SQL = """
+    UPDATE events
+    SET max_players = COALESCE(%s, max_players), venue = COALESCE(%s, venue),
+        event_date = COALESCE(%s, event_date)
+    WHERE event_id = %s
+"""
+
+BUMP_EVENT_SQL = "UPDATE events SET version = version + 1, updated_at = now() WHERE event_id = %s"
+
+EVENT_VERSION_SQL = "SELECT version FROM events WHERE event_id = %s"
+
+
+class StateBackend(ABC):
+    """Where an event's roster and settings live.
+
+    TeamManager calls these under its ``lock``. Each method applies the change
+    to the TeamManager's local state (bumping its version) and persists it.
+    """
+
+    @abstractmethod
+    async def load(self, team_manager: "TeamManager"):
+        """Fills a freshly created TeamManager with the stored state."""
+
+    @abstractmethod
+    async def sync(self, team_manager: "TeamManager"):
+        """Refreshes local state that other processes may have changed."""
+
+    @abstractmethod
+    async def join(self, team_manager: "TeamManager", entry: Player) -> Optional[str]:
+        """Returns the slot the entry landed in, or None if already listed."""
+
+    @abstractmethod
+    async def leave(self, team_manager: "TeamManager", user_id: int) -> Tuple[Optional[str], Optional[Player]]:
+        """Returns (slot left, reserve entry promoted in their place)."""
+
+    @abstractmethod
+    async def clear(self, team_manager: "TeamManager"):
+        """Removes everyone from the main team and the reserve list."""
+
+    @abstractmethod
+    async def update_settings(
+        self,
+        team_manager: "TeamManager",
+        max_players: Optional[int] = None,
+        venue: Optional[str] = None,
+        event_date: Optional[str] = None,
+        enforce_capacity: bool = False,
+    ) -> bool:
+        """Updates the given settings. With ``enforce_capacity``, refuses a
+        max_players below the current number of main players and returns False."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(StateBackend):
+    """State lives in this process; changes are persisted write-behind by RosterStore.
+
+    Fastest option, but only correct with a single worker process.
+    """
+
+    def __init__(self, store: Optional[RosterStore] = None):
+        self.store = store
+
+    async def load(self, team_manager: "TeamManager"):
+        if not self.store:
+            return
+        snapshot = await self.store.load_event(team_manager.event_id)
+        if snapshot:
+            team_manager.apply_snapshot(snapshot)
+
+    async def sync(self, team_manager: "TeamManager"):
+        pass  # nobody else writes this state
+
+    async def join(self, team_manager: "TeamManager", entry: Player) -> Optional[str]:
+        slot = team_manager.roster.join(entry, team_manager.max_players)
+        if slot is not None:
+            team_manager.mark_changed()
+            if self.store:
+                self.store.record_join(team_manager.event_id, entry, slot)
+        return slot
+
+    async def leave(self, team_manager: "TeamManager", user_id: int) -> Tuple[Optional[str], Optional[Player]]:
+        slot, promoted = team_manager.roster.leave(user_id)
+        if slot is not None:
+            team_manager.mark_changed()
+            if self.store:
+                self.store.record_leave(team_manager.event_id, user_id)
+                if promoted:
+                    self.store.record_promote(team_manager.event_id, promoted.user_id)
+        return slot, promoted
+
+    async def clear(self, team_manager: "TeamManager"):
+        team_manager.roster.clear()
+        team_manager.mark_changed()
+        if self.store:
+            self.store.record_clear(team_manager.event_id)
+
+    async def update_settings(
+        self,
+        team_manager: "TeamManager",
+        max_players: Optional[int] = None,
+        venue: Optional[str] = None,
+        event_date: Optional[str] = None,
+        enforce_capacity: bool = False,
+    ) -> bool:
+        if max_players is not None:
+            if enforce_capacity and max_players < team_manager.roster.main_count:
+                return False
+            team_manager.max_players = max_players
+        if venue is not None:
+            team_manager.venue = venue
+        if event_date is not None:
+            team_manager.event_date = event_date
+        team_manager.mark_changed()
+        if self.store:
+            self.store.record_settings(
+                team_manager.event_id, team_manager.max_players, team_manager.venue, team_manager.event_date
+            )
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory"}
+
+
+class PostgresBackend(StateBackend):
+    """State lives in Postgres, so any number of workers/replicas can serve one event.
+
+    Each mutation is one transaction: it locks the event row, applies the
+    change with atomic SQL and bumps ``events.version``. Only the outcome (slot,
+    promoted player, version before and after) comes back. If the local copy
+    was at the version the change started from, the same change is applied to
+    the local Roster in O(1); if another process changed the event in between
+    (the version skipped) or the local outcome differs, the event is reloaded.
+    Reads are served from the local copy, which is re-checked against
+    ``events.version`` at most every ``max_staleness`` seconds.
+    """
+
+    def __init__(self, db: Database, max_staleness: float = 1.0):
+        self.db = db
+        self.max_staleness = max_staleness
+
+        # Metrics
+        self.mutations = 0
+        self.applied_locally = 0
+        self.version_checks = 0
+        self.refreshes = 0
+
+    async def load(self, team_manager: "TeamManager"):
+        team_manager.synced_at = time.monotonic()
+        snapshot = EventSnapshot.from_rows(await self.db.fetchall(LOAD_EVENT_SQL, (team_manager.event_id,)))
+        # >= rather than >: rows written by the memory backend never bumped the version.
+        if snapshot is not None and snapshot.version >= team_manager.synced_version:
+            self.refreshes += 1
+            team_manager.apply_snapshot(snapshot)
+
+    async def sync(self, team_manager: "TeamManager"):
+        now = time.monotonic()
+        if now - team_manager.synced_at < self.max_staleness:
+            return
+        # Set before awaiting, so concurrent updates for this event don't all check.
+        team_manager.synced_at = now
+        self.version_checks += 1
+        rows = await self.db.fetchall(EVENT_VERSION_SQL, (team_manager.event_id,))
+        if rows and rows[0][0] > team_manager.synced_version:
+            await self.load(team_manager)
+
+    async def join(self, team_manager: "TeamManager", entry: Player) -> Optional[str]:
+        event_id = team_manager.event_id
+
+        def join(cursor):
+            base = self._lock_event(cursor, event_id)
+            cursor.execute(JOIN_ATOMIC_SQL, {
+                "event_id": event_id, "user_id": entry.user_id, "full_name": entry.full_name,
+                "username": entry.username, "joined_at": entry.joined_at,
+            })
+            row = cursor.fetchone()
+            slot = row[0] if row else None
+            return slot, base, self._finish(cursor, event_id, base, changed=slot is not None)
+
+        slot, base, version = await self.db.run(join, label="state_join")
+        if not (
+            self._in_step(team_manager, base)
+            and team_manager.roster.join(entry, team_manager.max_players) == slot
+        ):
+            await self._reload(team_manager)
+        else:
+            self._advance(team_manager, version)
+        return slot
+
+    async def leave(self, team_manager: "TeamManager", user_id: int) -> Tuple[Optional[str], Optional[Player]]:
+        event_id = team_manager.event_id
+
+        def leave(cursor):
+            base = self._lock_event(cursor, event_id)
+            cursor.execute(LEAVE_ATOMIC_SQL, (event_id, user_id))
+            row = cursor.fetchone()
+            slot = row[0] if row else None
+            promoted = None
+            if slot == MAIN:
+                cursor.execute(PROMOTE_NEXT_SQL, (event_id, event_id))
+                promoted = cursor.fetchone()
+            return slot, promoted, base, self._finish(cursor, event_id, base, changed=slot is not None)
+
+        slot, promoted, base, version = await self.db.run(leave, label="state_leave")
+        promoted_id = promoted[0] if promoted else None
+        if self._in_step(team_manager, base):
+            local_slot, local_promoted = team_manager.roster.leave(user_id)
+            if (local_slot, local_promoted.user_id if local_promoted else None) == (slot, promoted_id):
+                self._advance(team_manager, version)
+                return slot, local_promoted
+        await self._reload(team_manager)
+        return slot, (Player(*promoted) if promoted else None)
+
+    async def clear(self, team_manager: "TeamManager"):
+        event_id = team_manager.event_id
+
+        def clear(cursor):
+            base = self._lock_event(cursor, event_id)
+            cursor.execute(CLEAR_ATOMIC_SQL, (event_id,))
+            return base, self._finish(cursor, event_id, base, changed=True)
+
+        base, version = await self.db.run(clear, label="state_clear")
+        if self._in_step(team_manager, base):
+            team_manager.roster.clear()
+            self._advance(team_manager, version)
+        else:
+            await self._reload(team_manager)
+
+    async def update_settings(
+        self,
+        team_manager: "TeamManager",
+        max_players: Optional[int] = None,
+        venue: Optional[str] = None,
+        event_date: Optional[str] = None,
+        enforce_capacity: bool = False,
+    ) -> bool:
+        event_id = team_manager.event_id
+
+        def update(cursor):
+            base = self._lock_event(cursor, event_id)
+            if max_players is not None and enforce_capacity:
+                cursor.execute(MAIN_COUNT_SQL, (event_id,))
+                if max_players < cursor.fetchone()[0]:
+                    return False, base, self._finish(cursor, event_id, base, changed=False)
+            cursor.execute(UPDATE_SETTINGS_SQL, (max_players, venue, event_date, event_id))
+            return True, base, self._finish(cursor, event_id, base, changed=True)
+
+        updated, base, version = await self.db.run(update, label="state_settings")
+        if not self._in_step(team_manager, base):
+            await self._reload(team_manager)
+            return updated
+        if updated:
+            if max_players is not None:
+                team_manager.max_players = max_players
+            if venue is not None:
+                team_manager.venue = venue
+            if event_date is not None:
+                team_manager.event_date = event_date
+        self._advance(team_manager, version)
+        return updated
+
+    # === Helpers ===
+    @staticmethod
+    def _lock_event(cursor, event_id: str) -> int:
+        """Locks the event row and returns its version before the change."""
+        cursor.execute(LOCK_EVENT_SQL, (event_id, event_id))
+        return cursor.fetchone()[0]
+
+    def _finish(self, cursor, event_id: str, base: int, changed: bool) -> int:
+        """Bumps the event version if anything changed and returns the new one."""
+        self.mutations += 1
+        if not changed:
+            return base
+        cursor.execute(BUMP_EVENT_SQL, (event_id,))
+        return base + 1
+
+    @staticmethod
+    def _in_step(team_manager: "TeamManager", base: int) -> bool:
+        """Whether the local copy was at the version the change was made on."""
+        return team_manager.synced_version == base
+
+    def _advance(self, team_manager: "TeamManager", version: int):
+        """Records a change that was applied to the local copy as well."""
+        self.applied_locally += 1
+        team_manager.synced_at = time.monotonic()
+        if version != team_manager.synced_version:
+            team_manager.synced_version = version
+            team_manager.mark_changed()
+
+    async def _reload(self, team_manager: "TeamManager"):
+        """Replaces the local copy with the stored event, after changes by another process."""
+        team_manager.synced_version = -1  # whatever is stored is newer than what we have
+        await self.load(team_manager)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "postgres",
+            "mutations": self.mutations,
+            "applied_locally": self.applied_locally,
+            "version_checks": self.version_checks,
+            "refreshes": self.refreshes,
+        }
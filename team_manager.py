@@ -1,181 +1,246 @@
-import os
-import psycopg2
-from typing import List, Set, Tuple
-from dotenv import load_dotenv
+import asyncio
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from roster import MAIN, Player, Roster
+from roster_store import EventSnapshot
+from scheduler import EventSchedule
+from state_backend import MemoryBackend, StateBackend
+
+logger = logging.getLogger(__name__)
+
+# Roster lines per page. Names are cut to NAME_MAX characters, so even a full page
+# of the longest Telegram names stays well under the 4096-character message limit.
+PAGE_SIZE = 30
+NAME_MAX = 48
 
 class TeamManager:
-    def __init__(self):
-        self.super_admin_ids: Set[int] = set()
-        self.super_admin_usernames: Set[str] = {"vvmode","Xellision"}
-        self.admin_usernames: Set[str] = set()
-       
-        self.main_team: List[Tuple[int, str, str]] = []
-        self.reserve_team: List[Tuple[int, str, str]] = []
+    """Roster and settings of a single event. Admin permissions live in AdminManager.
+
+    Every mutation runs under the event's ``lock``, so concurrent updates can't
+    interleave between the capacity check and the insert, or between a leave and
+    the promotion it triggers. Where the state lives and how it's persisted is up
+    to the ``backend`` (see state_backend.py). Every change bumps ``version``;
+    rendered messages are memoized per version, so reads between changes are free.
+
+    With a ``schedule``, event_date is parsed into ``event_time`` whenever it
+    changes, and joins are refused while the schedule has signups locked.
+    ``on_promote`` is called with each reserve entry moved up to the main team.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        event_id: str = "default",
+        schedule: Optional[EventSchedule] = None,
+        on_promote: Optional[Callable[["TeamManager", Player], None]] = None,
+    ):
+        self.backend = backend or MemoryBackend()
+        self.event_id = event_id
+        self.schedule = schedule
+        self.on_promote = on_promote
+        self.event_time: Optional[datetime] = None
+        self._event_date = ""
+
+        self.lock = asyncio.Lock()
+        self.roster = Roster()
         self.max_players: int = 20
         self.venue: str = "Not Set"
         self.event_date: str = "Not Set"
-       # Load admin users from DB
-        self.load_admin_users_from_db()
-        
-    def set_super_admin(self, user_id: int, username: str = None):
-        self.super_admin_ids.add(user_id)
-        if username:
-            self.super_admin_usernames.add(username)
-        self.admin_ids.add(user_id)
-
-    def get_admins(self) -> List[str]:
-        """Returns a list of all admin usernames (excluding super admins)."""
-        return sorted(self.admin_usernames)
-
-    def add_admin(self, username: str) -> bool:
-        username = username.strip().lstrip('@')
-        if username and username not in self.super_admin_usernames and username not in self.admin_usernames:
-            self.store_admin_user_to_db(username)  # Store in DB and update in-memory set
-            return True
-        return False
-
-    def remove_admin(self, username: str) -> bool:
-        username = username.strip().lstrip('@')
-        if username in self.admin_usernames:
-            self.remove_admin_from_db(username)
-            self.admin_usernames.remove(username)
-            return True
-        return False
-        
-    def load_admin_users_from_db(self):
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                sslmode="require"
-            )
-            cursor = conn.cursor()
-            cursor.execute("SELECT username FROM admin_users")
-            rows = cursor.fetchall()
-
-            for (username,) in rows:
-                
-                if username:
-                    print(username)
-                    print("User name called")
-                    self.admin_usernames.add(username)
-
-            cursor.close()
-            conn.close()
-        except Exception as e:
-            print(f"❌ Failed to load admin users: {e}")
 
-    def store_admin_user_to_db(self, username: str):
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                sslmode="require"
-            )
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO admin_users (username)
-                VALUES (%s)
-                ON CONFLICT (username) DO UPDATE
-                SET username = EXCLUDED.username
-            """, (username,))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-        # Add to in-memory sets as well
-            if username:
-                self.admin_usernames.add(username)
-
-            print(f"✅ Admin user {username} stored successfully.")
-        except Exception as e:
-            print(f"❌ Failed to store admin user: {e}")
+        # Last stored version applied and when it was last checked (used by shared backends)
+        self.synced_version = 0
+        self.synced_at = 0.0
 
-    def remove_admin_from_db(self, username: str):
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                sslmode="require"
-            )
-            cursor = conn.cursor()
-
-            cursor.execute("DELETE FROM admin_users WHERE username = %s", (username,))
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            print(f"🗑 Admin user {username} removed from database.")
+        self.version = 0
+        self._render_cache: Dict[object, str] = {}  # page number or view name -> text
+        self._render_version = 0
+        # (list, first index) -> (entries on that page, rendered lines); see _page_lines
+        self._page_lines: Dict[Tuple[str, int], Tuple[Tuple[Player, ...], str]] = {}
 
-        except Exception as e:
-            print(f"❌ Failed to remove admin user from DB: {e}")
-        
-        
-    def is_admin(self, username: str = None) -> bool:
-        print("Is Admin Called ")
-        return (username is not None and username in self.admin_usernames
-        )
-
-    def is_super_admin(self, user_id: int = None, username: str = None) -> bool:
-        return (
-            (user_id is not None and user_id in self.super_admin_ids)
-            or (username is not None and username in self.super_admin_usernames)
-        )
+    async def set_event_details(self, max_players: int, venue: str, event_date: str):
+        async with self.lock:
+            await self.backend.update_settings(self, max_players=max_players, venue=venue, event_date=event_date)
 
-    def set_event_details(self, max_players: int, venue: str, event_date: str):
-        self.max_players = max_players
-        self.venue = venue
-        self.event_date = event_date
+    async def set_max_players(self, max_players: int) -> bool:
+        """Sets the team size unless it's below the current number of main players."""
+        async with self.lock:
+            return await self.backend.update_settings(self, max_players=max_players, enforce_capacity=True)
 
-    def clear_teams(self):
-        self.main_team.clear()
-        self.reserve_team.clear()
+    async def set_venue(self, venue: str):
+        async with self.lock:
+            await self.backend.update_settings(self, venue=venue)
 
-    def join_team(self, user_id: int, full_name: str, username: str) -> str:
-        if any(user_id == uid for uid, _, _ in self.main_team + self.reserve_team):
-            return "⚠️ You're already in the team or reserve list."
+    async def set_event_date(self, event_date: str):
+        async with self.lock:
+            await self.backend.update_settings(self, event_date=event_date)
 
-        entry = (user_id, full_name, username)
+    async def load_state(self):
+        """Restores the roster and settings for this event from the backend."""
+        try:
+            async with self.lock:
+                await self.backend.load(self)
+        except Exception as e:
+            logger.error(f"❌ Failed to load event state for {self.event_id}: {e}")
 
-        if len(self.main_team) < self.max_players:
-            self.main_team.append(entry)
+    async def sync(self):
+        """Picks up changes made by other processes; a no-op for the in-memory backend."""
+        try:
+            await self.backend.sync(self)
+        except Exception as e:
+            logger.error(f"❌ Failed to sync event state for {self.event_id}: {e}")
+
+    @property
+    def event_date(self) -> str:
+        return self._event_date
+
+    @event_date.setter
+    def event_date(self, event_date: str):
+        if event_date != self._event_date:
+            self._event_date = event_date
+            self.event_time = self.schedule.parse(event_date) if self.schedule else None
+
+    def signups_locked(self) -> bool:
+        return self.schedule is not None and self.schedule.signups_locked(self.event_time)
+
+    def apply_snapshot(self, snapshot: EventSnapshot):
+        self.max_players = snapshot.max_players
+        self.venue = snapshot.venue
+        self.event_date = snapshot.event_date
+        self.roster.load(snapshot.main_team, snapshot.reserve_team)
+        self.synced_version = snapshot.version
+        self.mark_changed()
+
+    @property
+    def main_team(self) -> List[Player]:
+        return list(self.roster.main_entries())
+
+    @property
+    def reserve_team(self) -> List[Player]:
+        return list(self.roster.reserve_entries())
+
+    def in_main_team(self, user_id: int) -> bool:
+        return self.roster.is_main(user_id)
+
+    async def clear_teams(self):
+        async with self.lock:
+            await self.backend.clear(self)
+
+    async def join_team(self, user_id: int, full_name: str, username: str) -> str:
+        if self.signups_locked():
+            return "🔒 Signups are closed for this event."
+        entry = Player(user_id, full_name, username)
+        async with self.lock:
+            slot = await self.backend.join(self, entry)
+
+        if slot is None:
+            return "⚠️ You're already in the team or reserve list."
+        if slot == MAIN:
             return "✅ You've been added to the main team!"
-        else:
-            self.reserve_team.append(entry)
-            return "🕒 Main team full. You've been added to the reserve list."
-
-    def leave_team(self, user_id: int) -> str:
-        for team in [self.main_team, self.reserve_team]:
-            for i, (uid, _, _) in enumerate(team):
-                if uid == user_id:
-                    team.pop(i)
-                    if team is self.main_team and self.reserve_team:
-                        promoted = self.reserve_team.pop(0)
-                        self.main_team.append(promoted)
-                        return f"👋 You left. {promoted[1]} (@{promoted[2]}) promoted from reserve list."
-                    return "👋 You've left the team."
-        return "❌ You're not in any list."
+        return "🕒 Main team full. You've been added to the reserve list."
+
+    async def leave_team(self, user_id: int) -> str:
+        async with self.lock:
+            slot, promoted = await self.backend.leave(self, user_id)
+
+        if slot is None:
+            return "❌ You're not in any list."
+        if promoted:
+            if self.on_promote is not None:
+                self.on_promote(self, promoted)
+            return f"👋 You left. {promoted.full_name} (@{promoted.username}) promoted from reserve list."
+        return "👋 You've left the team."
+
+    # === Rendering ===
+    def mark_changed(self):
+        self.version += 1
+
+    def _cached(self, key: object, render: Callable[[], str]) -> str:
+        if self._render_version != self.version:
+            self._render_cache.clear()
+            self._render_version = self.version
+        text = self._render_cache.get(key)
+        if text is None:
+            text = self._render_cache[key] = render()
+        return text
+
+    def page_count(self) -> int:
+        entries = self.roster.main_count + self.roster.reserve_count
+        return (entries - 1) // PAGE_SIZE + 1 if entries else 1
+
+    def get_team_message(self, page: int = 0) -> str:
+        """The roster message for one page; main and reserve entries share one page sequence."""
+        # Pages are cached under their number; inlined rather than _cached() as this is the hottest read.
+        if self._render_version == self.version:
+            text = self._render_cache.get(page)
+            if text is not None:
+                return text
+        page = min(max(page, 0), self.page_count() - 1)
+        return self._cached(page, lambda: self._render_team_message(page))
+
+    def _render_team_message(self, page: int) -> str:
+        roster = self.roster
+        if not (roster.main_count or roster.reserve_count):
+            return "👥 <b>The team is currently empty.</b>"
+
+        start, stop = page * PAGE_SIZE, (page + 1) * PAGE_SIZE
+        main_count = roster.main_count
+        parts = []
+        if start < main_count or page == 0:
+            parts.append(f"👥 <b>Current Team Members (Max {self.max_players}):</b>\n")
+            if main_count:
+                parts.append(self._lines("main", roster.main_entries(), start, min(stop, main_count)))
+            else:
+                parts.append("No team members yet.")
+
+        reserve_start = max(start - main_count, 0)
+        if reserve_start < roster.reserve_count and stop > main_count:
+            if parts:
+                parts.append("\n\n")
+            parts.append("🕒 <b>Reserve List:</b>\n")
+            parts.append(self._lines("reserve", roster.reserve_entries(), reserve_start, stop - main_count))
+
+        parts.append(f"\n\n📅 Event Date: {self.event_date}\n📍 Venue: {self.venue}")
+        pages = self.page_count()
+        if pages > 1:
+            parts.append(f"\n📄 Page {page + 1}/{pages}")
+        return "".join(parts)
+
+    def _lines(self, kind: str, entries: Iterator[Player], start: int, stop: int) -> str:
+        # Each page's lines are cached with the entries they were rendered from. A join or
+        # leave only changes the pages whose entries actually moved; the others are reused
+        # after a cheap tuple comparison, without formatting anything.
+        page_entries = tuple(islice(entries, start, stop))
+        key = (kind, start)
+        cached = self._page_lines.get(key)
+        if cached is not None and cached[0] == page_entries:
+            return cached[1]
+        lines = "\n".join(
+            f"{i}. {self._short(player.full_name)} (@{player.username})"
+            for i, player in enumerate(page_entries, start + 1)
+        )
+        if len(self._page_lines) > 2 * self.page_count() + 8:
+            self._page_lines.clear()  # drop pages left over from a bigger roster
+        self._page_lines[key] = (page_entries, lines)
+        return lines
+
+    @staticmethod
+    def _short(name: str) -> str:
+        return name if len(name) <= NAME_MAX else name[:NAME_MAX - 1] + "…"
 
     def format_team_list(self) -> str:
+        return self._cached("team_list", self._render_team_list)
+
+    def _render_team_list(self) -> str:
         lines = ["👥 <b>Current Team Members:</b>"]
-        for i, (_, name, username) in enumerate(self.main_team, 1):
-            lines.append(f"{i} {name} (@{username})")
-        if not self.main_team:
+        for i, player in enumerate(self.roster.main_entries(), 1):
+            lines.append(f"{i} {player.full_name} (@{player.username})")
+        if not self.roster.main_count:
             lines.append("No team members yet.")
 
-        if self.reserve_team:
+        if self.roster.reserve_count:
             lines.append("\n🕒 <b>Reserve List:</b>")
-            for i, (_, name, username) in enumerate(self.reserve_team, 1):
-                lines.append(f"{i}. {name} (@{username})")
+            for i, player in enumerate(self.roster.reserve_entries(), 1):
+                lines.append(f"{i}. {player.full_name} (@{player.username})")
         return "\n".join(lines)
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from admin_manager import AdminManager, decode_changes, encode_changes
+from admin_sync import AdminSync
+
+
+class AdminDatabase:
+    """Answers LOAD_ADMINS_SQL with a fixed (version, usernames) row."""
+
+    def __init__(self, version, usernames):
+        self.row = (version, usernames)
+        self.loads = 0
+
+    async def fetchall(self, sql, params=None):
+        self.loads += 1
+        return [self.row]
+
+
+class ListenConnection:
+    def __init__(self, *payloads):
+        self.notifies = [SimpleNamespace(payload=payload) for payload in payloads]
+
+    def poll(self):
+        pass
+
+
+def test_changes_round_trip_through_the_payload():
+    changes = [("+", "alice"), ("-", "bob")]
+    assert encode_changes(7, changes) == "7 +alice -bob"
+    assert decode_changes("7 +alice -bob") == (7, changes)
+
+
+def test_oversized_change_is_published_as_a_reload():
+    changes = [("+", f"user{i:05d}") for i in range(1000)]
+    assert encode_changes(3, changes) == "3 *"
+    assert decode_changes("3 *") == (3, None)
+
+
+def test_malformed_payload_is_rejected():
+    with pytest.raises(ValueError):
+        decode_changes("4 ?alice")
+
+
+def test_apply_change_patches_in_order_and_reports_gaps():
+    manager = AdminManager(db=None)
+    assert manager.apply_change(1, [("+", "alice"), ("+", "bob")])
+    assert manager.apply_change(2, [("-", "bob")])
+    assert manager.admin_usernames == {"alice"} and manager.synced_version == 2
+    assert manager.apply_change(2, [("+", "bob")])  # a repeat is ignored
+    assert manager.admin_usernames == {"alice"}
+    assert not manager.apply_change(4, [("+", "carol")])  # 3 was missed
+    assert not manager.apply_change(3, None)  # too big to patch in
+    assert manager.admin_usernames == {"alice"} and manager.synced_version == 2
+
+
+def test_version_gap_reloads_the_admin_set():
+    async def scenario():
+        db = AdminDatabase(5, ["alice", "carol"])
+        manager = AdminManager(db)
+        manager.apply_change(1, [("+", "alice"), ("+", "bob")])
+        sync = AdminSync(manager, db)
+        sync._conn = ListenConnection("2 -bob", "4 +carol", "5 +dave")
+        sync._on_readable()
+        await sync._reload_task
+        return sync, manager, db
+
+    sync, manager, db = asyncio.run(scenario())
+    assert sync.notifications == 3
+    assert sync.reloads == 1 and db.loads == 1  # both out-of-order changes share one reload
+    assert manager.admin_usernames == {"alice", "carol"}
+    assert manager.synced_version == 5
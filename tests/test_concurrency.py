@@ -0,0 +1,24 @@
+import sys
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STRESS = [sys.executable, "-m", "benchmarks.stress_concurrency", "--users", "100", "--taps", "4", "--max-players", "10"]
+
+
+def stress(*flags: str) -> subprocess.CompletedProcess:
+    # A separate process each time: the bot module's lifespan only runs once per process.
+    return subprocess.run(STRESS + list(flags), cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+
+def test_concurrent_taps_keep_roster_invariants():
+    result = stress()
+    assert result.returncode == 0, result.stdout
+
+
+def test_invariants_fail_without_event_lock():
+    # Guards the stress test itself: it must be able to catch a missing lock.
+    result = stress("--no-lock")
+    assert result.returncode == 1, result.stdout
+    assert "❌" in result.stdout
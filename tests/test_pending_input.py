@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+from pending_input import AwaitingInputFilter, PendingInputStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def message(user_id: int, chat_id: int):
+    return SimpleNamespace(from_user=SimpleNamespace(id=user_id), chat=SimpleNamespace(id=chat_id))
+
+
+def test_prompt_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("pending_input.time.time", lambda: now[0])
+    store = PendingInputStore(ttl=60)
+    run(store.set(1, -100, "venue"))
+    now[0] += 59
+    assert store.waiting(1, -100)
+    now[0] += 2
+    assert not store.waiting(1, -100)
+    assert run(store.pop(1, -100)) is None
+    assert store.stats()["evicted"] == 1 and len(store) == 0
+
+
+def test_oldest_prompt_is_evicted_beyond_max_entries():
+    store = PendingInputStore(max_entries=2)
+    for user_id in (1, 2, 3):
+        run(store.set(user_id, -100, "venue"))
+    assert [store.waiting(user_id, -100) for user_id in (1, 2, 3)] == [False, True, True]
+    run(store.set(2, -100, "event_date"))  # asking again moves the user to the back
+    run(store.set(4, -100, "venue"))
+    assert [store.waiting(user_id, -100) for user_id in (2, 3, 4)] == [True, False, True]
+
+
+def test_answer_only_counts_in_the_chat_it_was_asked_in():
+    store = PendingInputStore()
+    run(store.set(1, -100, "max_players"))
+    waiting_filter = AwaitingInputFilter(store)
+    assert not waiting_filter.filter(message(1, -200))
+    assert run(store.pop(1, -200)) is None
+    assert waiting_filter.filter(message(1, -100))
+    assert run(store.pop(1, -100)) == "max_players"
+    assert run(store.pop(1, -100)) is None  # answered once
+
+
+class ClaimingDatabase:
+    """pending_inputs table shared by several stores, as with several workers."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def execute(self, sql, params=None):
+        user_id, chat_id, field, expires_at = params
+        self.rows[user_id] = (chat_id, field)
+
+    async def fetchall(self, sql, params=None):
+        user_id, chat_id = params
+        if self.rows.get(user_id, (None,))[0] != chat_id:
+            return []
+        return [(self.rows.pop(user_id)[1],)]
+
+
+def test_prompt_sent_by_one_worker_is_answered_on_another():
+    db = ClaimingDatabase()
+    worker_a, worker_b = PendingInputStore(db), PendingInputStore(db)
+    run(worker_a.set(1, -100, "venue"))
+    assert AwaitingInputFilter(worker_b).filter(message(1, -100))  # the handler does the lookup
+    assert run(worker_b.pop(1, -100)) == "venue"
+    assert run(worker_a.pop(1, -100)) is None
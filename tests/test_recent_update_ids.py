@@ -0,0 +1,31 @@
+from update_queue import RecentUpdateIds
+
+
+def test_full_set_still_catches_a_repeat_of_its_oldest_id():
+    recent = RecentUpdateIds(max_size=3)
+    assert [recent.check_and_add(update_id) for update_id in (1, 2, 3, 1)] == [False, False, False, True]
+    assert not recent.check_and_add(4)  # evicts 1, the oldest
+    assert len(recent) == 3
+    assert [recent.check_and_add(update_id) for update_id in (2, 3, 4, 1)] == [True, True, True, False]
+
+
+def test_forgotten_id_is_accepted_again_and_does_not_use_a_slot():
+    recent = RecentUpdateIds(max_size=3)
+    recent.check_and_add(1)
+    recent.check_and_add(2)
+    recent.forget(2)  # e.g. the update was shed with 503
+    assert not recent.check_and_add(2)  # Telegram's redelivery goes through
+    assert recent.check_and_add(2)  # and is deduplicated from then on
+    recent.check_and_add(3)
+    assert len(recent) == 3
+    assert recent.check_and_add(1)  # the forgotten slot didn't push 1 out
+
+
+def test_ids_expire_after_the_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("update_queue.time.monotonic", lambda: now[0])
+    recent = RecentUpdateIds(window=10, max_size=100)
+    recent.check_and_add(1)
+    now[0] += 11
+    assert not recent.check_and_add(1)
+    assert recent.stats() == {"tracked": 1, "duplicates": 0, "new": 2}
@@ -0,0 +1,43 @@
+from roster import MAIN, RESERVE, Player, Roster
+
+
+def ids(entries):
+    return [player.user_id for player in entries]
+
+
+def roster_with(main: int, reserve: int, max_players: int) -> Roster:
+    roster = Roster()
+    for user_id in range(1, main + reserve + 1):
+        roster.join(Player(user_id, f"Player {user_id}", f"player{user_id}"), max_players)
+    return roster
+
+
+def test_rejoining_the_reserve_goes_to_the_back_and_promotion_skips_the_stale_slot():
+    roster = roster_with(main=2, reserve=2, max_players=2)  # main 1, 2; reserve 3, 4
+    assert roster.leave(3) == (RESERVE, None)
+    assert roster.join(Player(3, "Player 3", "player3"), 2) == RESERVE
+    assert ids(roster.reserve_entries()) == [4, 3]
+
+    slot, promoted = roster.leave(1)
+    assert (slot, promoted.user_id) == (MAIN, 4)  # not 3, whose old slot was ahead of 4
+    slot, promoted = roster.leave(2)
+    assert (slot, promoted.user_id) == (MAIN, 3)
+    assert ids(roster.main_entries()) == [4, 3]
+    assert roster.reserve_count == 0 and roster.leave(1) == (None, None)
+
+
+def test_compaction_keeps_reserve_order():
+    roster = roster_with(main=2, reserve=10, max_players=2)  # reserve 3..12
+    # Cycle reserve players out and back in, enough to force several compactions.
+    for round_ in range(60):
+        for user_id in (3 + round_ % 10, 3 + (round_ + 5) % 10):
+            roster.leave(user_id)
+            roster.join(Player(user_id, f"Player {user_id}", f"player{user_id}"), 2)
+    expected = ids(roster.reserve_entries())
+    assert sorted(expected) == list(range(3, 13))
+    assert len(roster._reserve_queue) <= 2 * roster.reserve_count + 32  # 120 stale slots were made
+
+    promoted = []
+    while roster.reserve_count:
+        promoted.append(roster.leave(next(iter(ids(roster.main_entries()))))[1].user_id)
+    assert promoted == expected
@@ -0,0 +1,63 @@
+import asyncio
+
+import psycopg2
+
+from roster import Player
+from roster_store import ENSURE_EVENT_SQL, RosterStore
+
+
+class RejectingDatabase:
+    """Runs batches all-or-nothing and rejects any containing a leave of ``poison_user``."""
+
+    def __init__(self, poison_user: int = None, down: bool = False):
+        self.poison_user = poison_user
+        self.down = down
+        self.written = []
+
+    async def execute_many(self, statements):
+        if self.down:
+            raise psycopg2.OperationalError("could not connect to server")
+        for sql, params in statements:
+            if sql != ENSURE_EVENT_SQL and params[1:2] == (self.poison_user,) and "DELETE" in sql:
+                raise psycopg2.DataError("invalid input")
+        self.written.extend(params for sql, params in statements if sql != ENSURE_EVENT_SQL)
+
+
+def flush(store: RosterStore, times: int):
+    async def scenario():
+        for _ in range(times):
+            await store.flush()
+    asyncio.run(scenario())
+
+
+def test_statement_the_database_keeps_rejecting_is_dropped_after_retries():
+    db = RejectingDatabase(poison_user=2)
+    store = RosterStore(db, max_retries=3)
+    store.record_join("e", Player(1, "One", "one"), "main")
+    store.record_leave("e", 2)
+    store.record_join("e", Player(3, "Three", "three"), "main")
+
+    flush(store, 3)
+    assert db.written == [] and store.stats()["pending"] == 3
+
+    flush(store, 1)  # one statement at a time
+    assert [params[1] for params in db.written] == [1, 3]
+    assert store.stats()["dropped_ops"] == 1 and store.stats()["pending"] == 0
+
+    store.record_join("e", Player(4, "Four", "four"), "main")
+    flush(store, 1)  # back to whole batches
+    assert db.written[-1][1] == 4
+
+
+def test_outage_keeps_changes_but_caps_the_backlog():
+    db = RejectingDatabase(down=True)
+    store = RosterStore(db, max_retries=1, max_pending=5)
+    for user_id in range(1, 8):
+        store.record_join("e", Player(user_id, "P", "p"), "main")
+    flush(store, 3)
+    assert store.stats()["pending"] == 5
+    assert store.stats()["dropped_ops"] == 2  # the two oldest, over the cap
+
+    db.down = False
+    flush(store, 1)
+    assert [params[1] for params in db.written] == [3, 4, 5, 6, 7]
@@ -0,0 +1,61 @@
+import json
+import asyncio
+
+import pytest
+
+from benchmarks import fakes  # also sets the offline bot token
+from telegram.error import BadRequest
+
+import football_bot
+from scheduler import RESET, Job
+
+EVENT_DATE = "2025-06-01 19:00"
+
+
+class FailingTelegramRequest(fakes.FakeTelegramRequest):
+    """Rejects every sendMessage call."""
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        if url.endswith("/sendMessage"):
+            return 400, json.dumps({"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}).encode()
+        return await super().do_request(url, method, request_data, **kwargs)
+
+
+async def reset_job(chat_id: int, players: int) -> Job:
+    team_manager = await football_bot.event_registry.get(chat_id)
+    for user_id in range(1, players + 1):
+        await team_manager.join_team(user_id, f"Player {user_id} " + "X" * 40, f"player_{user_id}_handle")
+    team_manager.event_date = EVENT_DATE
+    due = dict(football_bot.event_schedule.jobs_for(team_manager.event_time))[RESET]
+    return Job(team_manager.event_id, chat_id, RESET, due, 1)
+
+
+def run_reset(telegram: fakes.FakeTelegramRequest, chat_id: int, players: int):
+    async def scenario():
+        fakes.install(football_bot, telegram, fakes.FakeDatabase())
+        await football_bot.run_job(await reset_job(chat_id, players))
+        return await football_bot.event_registry.get(chat_id)
+
+    return asyncio.run(scenario())
+
+
+def test_reset_posts_every_page_within_the_length_limit_then_clears():
+    telegram = fakes.FakeTelegramRequest()
+    team_manager = run_reset(telegram, -300, 300)
+
+    texts = [params["text"] for name, params in telegram.calls if name == "sendMessage"]
+    assert len(texts) == 10
+    assert all(len(text) <= 4096 for text in texts)
+    assert sum(text.count("_handle)") for text in texts) == 300
+    assert team_manager.roster.main_count == team_manager.roster.reserve_count == 0
+
+
+def test_failed_reset_keeps_the_roster():
+    with pytest.raises(BadRequest):
+        run_reset(FailingTelegramRequest(), -301, 40)
+
+    async def roster_size():
+        team_manager = await football_bot.event_registry.get(-301)
+        return team_manager.roster.main_count + team_manager.roster.reserve_count
+
+    assert asyncio.run(roster_size()) == 40
@@ -0,0 +1,75 @@
+import time
+import asyncio
+
+from scheduler import LOCK, JobScheduler
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_job_scheduled_into_empty_scheduler_fires():
+    async def scenario():
+        fired = []
+
+        async def on_due(job):
+            fired.append(job.kind)
+
+        scheduler = JobScheduler(on_due)
+        await scheduler.start()
+        await asyncio.sleep(0)  # let the timer task go idle on the empty heap
+        try:
+            await scheduler.replace_event_jobs("-100", -100, [(LOCK, time.time() + 0.1)])
+            await wait_for(lambda: fired)
+            # The heap is empty again; a later job must wake the timer too.
+            await scheduler.replace_event_jobs("-200", -200, [(LOCK, time.time() + 0.1)])
+            await wait_for(lambda: len(fired) == 2)
+        finally:
+            await scheduler.stop()
+        assert fired == [LOCK, LOCK]
+        assert scheduler.fired == 2
+
+    asyncio.run(scenario())
+
+
+class WakingDatabase:
+    """Fails the first ``failures`` loads, like a database that is still starting up."""
+
+    def __init__(self, rows, failures: int = 1):
+        self.rows = rows
+        self.failures = failures
+        self.loads = 0
+
+    async def fetchall(self, sql, params=None):
+        self.loads += 1
+        if self.loads <= self.failures:
+            raise ConnectionError("the database system is starting up")
+        return self.rows
+
+    async def run(self, fn, label="run"):
+        return True  # every claim succeeds
+
+
+def test_persisted_jobs_are_loaded_once_the_database_answers():
+    async def scenario():
+        fired = []
+
+        async def on_due(job):
+            fired.append((job.event_id, job.kind))
+
+        db = WakingDatabase([("-100:default", -100, LOCK, time.time() + 0.1)])
+        scheduler = JobScheduler(on_due, db, load_retry_delay=0.01)
+        await scheduler.start()
+        try:
+            await wait_for(lambda: fired)
+        finally:
+            await scheduler.stop()
+        return fired, db.loads, scheduler.stats()
+
+    fired, loads, stats = asyncio.run(scenario())
+    assert fired == [("-100:default", LOCK)]
+    assert loads == 2
+    assert stats["loaded"] and stats["load_failures"] == 1
@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+
+from benchmarks import fakes  # also sets the offline bot token
+
+import football_bot
+
+
+async def get(path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=football_bot.app)  # no lifespan: warm-up isn't run here
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        if path == "/webhook":
+            return await client.post(path, json=fakes.command_update(1, "/start"))
+        return await client.get(path)
+
+
+def test_warm_up_retries_a_failing_step(monkeypatch):
+    monkeypatch.setattr(football_bot, "STARTUP_RETRY_DELAY", 0)
+    monkeypatch.setattr(football_bot, "startup_failures", 0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("network down")
+        return "ok"
+
+    assert asyncio.run(football_bot.with_retries("flaky", flaky)) == "ok"
+    assert len(attempts) == 3
+    assert football_bot.startup_failures == 2
+
+
+def test_webhook_asks_for_redelivery_while_warm_up_is_failing(monkeypatch):
+    monkeypatch.setattr(football_bot, "startup_failures", 1)
+    monkeypatch.setattr(football_bot, "webhook_rejects", dict(football_bot.webhook_rejects))
+    response = asyncio.run(get("/webhook"))
+    assert response.status_code == 503
+    assert football_bot.webhook_rejects["not_ready"] == 1
+
+
+def test_health_check_reports_a_permanent_startup_failure(monkeypatch):
+    monkeypatch.setattr(football_bot, "STARTUP_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(football_bot, "STARTUP_RETRY_DELAY", 0)
+    monkeypatch.setattr(football_bot, "startup_failures", 0)
+    monkeypatch.setattr(football_bot, "startup_error", None)
+    monkeypatch.setattr(football_bot, "register_handlers", lambda: None)
+
+    async def nothing():
+        pass
+
+    async def unreachable():
+        raise ConnectionError("api.telegram.org unreachable")
+
+    monkeypatch.setattr(football_bot, "warm_up_database", nothing)
+    monkeypatch.setattr(football_bot, "initialize_telegram", unreachable)
+
+    asyncio.run(football_bot.warm_up())
+    assert not football_bot.ready.is_set()
+    assert football_bot.startup_failures == 2
+
+    response = asyncio.run(get("/"))
+    assert response.status_code == 503
+    assert response.json()["status"] == "failed"
+    assert asyncio.run(get("/webhook")).status_code == 503
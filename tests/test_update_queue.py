@@ -0,0 +1,40 @@
+import asyncio
+
+from telegram import Update
+
+from benchmarks import fakes
+from update_queue import UpdateQueue
+
+
+def updates(user_id: int, count: int):
+    return [Update.de_json(fakes.command_update(user_id, f"/start {i}"), None) for i in range(count)]
+
+
+def test_updates_chained_behind_a_busy_user_count_towards_maxsize():
+    async def scenario():
+        gate = asyncio.Event()
+        processed = []
+
+        async def process(update):
+            await gate.wait()
+            processed.append(update.update_id)
+
+        queue = UpdateQueue(process, workers=2, maxsize=10, enqueue_timeout=0)
+        queue.start()
+        accepted = []
+        for update in updates(1, 5000):
+            if await queue.submit(update):
+                accepted.append(update.update_id)
+            await asyncio.sleep(0)  # let the idle worker move queued updates into the user's chain
+        stats = queue.stats()
+        gate.set()
+        await queue.drain()
+        await queue.stop()
+        return accepted, processed, stats
+
+    accepted, processed, stats = asyncio.run(scenario())
+    assert len(accepted) == 11  # one in flight plus maxsize waiting
+    assert stats["shed"] == 5000 - 11
+    assert stats["depth"] == 10
+    assert stats["chained"] > 0
+    assert processed == accepted  # still in arrival order
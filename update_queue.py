@@ -0,0 +1,226 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Tuple
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+QueuedUpdate = Tuple[Update, float]
+
+
+class RecentUpdateIds:
+    """update_ids seen in the last ``window`` seconds, at most ``max_size`` of them.
+
+    Telegram redelivers an update when our acknowledgement was slow or lost;
+    checking here drops the repeat in O(1) before it's parsed into an Update.
+    A ring buffer of (seen_at, update_id) keeps arrival order for expiry and a
+    dict maps each live id to its seen_at. ``forget`` removes an id whose
+    update wasn't accepted after all, so its redelivery goes through.
+    """
+
+    def __init__(self, window: float = 600.0, max_size: int = 10000):
+        self.window = window
+        self.max_size = max_size
+        self._ring: Deque[Tuple[float, int]] = deque()
+        self._seen: Dict[int, float] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def check_and_add(self, update_id: int) -> bool:
+        """Returns True if the id was already seen; otherwise records it and returns False."""
+        now = time.monotonic()
+        self._expire(now)
+        if update_id in self._seen:
+            self.hits += 1
+            return True
+        self.misses += 1
+        # Make room only for a new id, so a full set still catches a repeat of its oldest one.
+        while len(self._seen) >= self.max_size:
+            self._evict_oldest()
+        self._seen[update_id] = now
+        self._ring.append((now, update_id))
+        if len(self._ring) > 2 * self.max_size:
+            self._compact()
+        return False
+
+    def forget(self, update_id: int):
+        self._seen.pop(update_id, None)
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        ring = self._ring
+        while ring and ring[0][0] < cutoff:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        seen_at, update_id = self._ring.popleft()
+        # Skip slots of ids that were forgotten (and maybe seen again since).
+        if self._seen.get(update_id) == seen_at:
+            del self._seen[update_id]
+
+    def _compact(self):
+        # Slots of forgotten ids pile up when many updates are shed; keep only live ones.
+        seen = self._seen
+        self._ring = deque(slot for slot in self._ring if seen.get(slot[1]) == slot[0])
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tracked": len(self._seen), "duplicates": self.hits, "new": self.misses}
+
+
+class UpdateQueue:
+    """Bounded queue between the webhook endpoint and a pool of update workers.
+
+    The webhook only parses and enqueues, so Telegram gets its acknowledgement
+    without waiting for our handlers or outbound API calls. When the queue is
+    full, ``submit`` waits up to ``enqueue_timeout`` seconds for room and then
+    sheds the update so the endpoint can ask Telegram to redeliver it later.
+
+    Updates from the same user are processed in arrival order: while one is in
+    flight, later ones are chained behind it on the same worker. Chained updates
+    still count towards ``maxsize`` until they start, so one busy user can't
+    grow the backlog past it.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Update], Awaitable[Any]],
+        workers: int = 8,
+        maxsize: int = 1000,
+        enqueue_timeout: float = 0.0,
+    ):
+        self.process = process
+        self.workers = workers
+        self.maxsize = maxsize
+        self.enqueue_timeout = enqueue_timeout
+        # Unbounded itself: _room caps updates waiting in the queue and in per-user chains together.
+        self._queue: "asyncio.Queue[QueuedUpdate]" = asyncio.Queue()
+        self._room = asyncio.Semaphore(maxsize)
+        self._waiting = 0
+        self._chained = 0
+        self._in_flight: Dict[Hashable, Deque[QueuedUpdate]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        # Metrics
+        self.enqueued = 0
+        self.shed = 0
+        self.processed = 0
+        self.failed = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.processing_total = 0.0
+        self.processing_max = 0.0
+
+    # === Lifecycle ===
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Lets queued updates finish (up to ``drain_timeout``), then stops the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.drain(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Stopping with {self._waiting} updates still queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self):
+        """Waits until every update submitted so far has been processed."""
+        await self._queue.join()
+
+    # === Producer side ===
+    async def submit(self, update: Update) -> bool:
+        """Enqueues the update. Returns False if it was shed because the queue stayed full."""
+        if not self._room.locked():
+            await self._room.acquire()  # doesn't suspend while there's room
+        elif self.enqueue_timeout <= 0:
+            self.shed += 1
+            return False
+        else:
+            try:
+                await asyncio.wait_for(self._room.acquire(), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+        self._waiting += 1
+        self._queue.put_nowait((update, time.perf_counter()))
+        self.enqueued += 1
+        return True
+
+    # === Consumer side ===
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            key = self._ordering_key(item[0])
+
+            chained = self._in_flight.get(key)
+            if chained is not None:
+                # Another worker is handling this user; it will pick this one up next.
+                chained.append(item)
+                self._chained += 1
+                continue
+
+            chained = self._in_flight[key] = deque()
+            try:
+                await self._process(item)
+                while chained:
+                    self._chained -= 1
+                    await self._process(chained.popleft())
+            finally:
+                del self._in_flight[key]
+
+    async def _process(self, item: QueuedUpdate):
+        update, enqueued_at = item
+        self._waiting -= 1
+        self._room.release()
+        started = time.perf_counter()
+        lag = started - enqueued_at
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        try:
+            await self.process(update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Failed to process update {update.update_id}: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            self.processing_total += elapsed
+            self.processing_max = max(self.processing_max, elapsed)
+            self._queue.task_done()
+
+    @staticmethod
+    def _ordering_key(update: Update) -> Hashable:
+        user = update.effective_user
+        # Updates without a user (e.g. channel posts) have nothing to be ordered against.
+        return ("user", user.id) if user else ("update", update.update_id)
+
+    # === Metrics ===
+    def stats(self) -> Dict[str, Any]:
+        done = self.processed + self.failed
+        return {
+            "depth": self._waiting,  # queued plus chained
+            "chained": self._chained,
+            "maxsize": self.maxsize,
+            "workers": self.workers,
+            "enqueued": self.enqueued,
+            "shed": self.shed,
+            "processed": self.processed,
+            "failed": self.failed,
+            "lag_avg_ms": round(self.lag_total / done * 1000, 3) if done else 0.0,
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            "processing_avg_ms": round(self.processing_total / done * 1000, 3) if done else 0.0,
+            "processing_max_ms": round(self.processing_max * 1000, 3),
+        }